@@ -1,78 +1,250 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict
+import logging
+import time
+from fastapi import APIRouter, HTTPException, Request
+from typing import Dict, Optional, Tuple
 from app.models.metadata import Dashboard
-from app.core.metadata_extractor import fetch_dashboard_metadata, build_training_documents
+from app.core.metadata_extractor import fetch_dashboard_metadata, fetch_dataset_details
+from app.core.fast_path import (
+    select_chart_sql,
+    describe_rows,
+    record_insight_path,
+    observe_fast_path,
+    observe_llm_path,
+)
 from app.core.training_pack import build_training_pack
 from app.core.schema_analyzer import analyze_schema
 from app.llm.vector_store import VectorStore
 from app.llm.langchain_agent import RAGAgent
 from app.llm.embeddings import get_embedding
+from app.llm.documents import CHART_SQL, doc_id
 from app.sql.executor import execute_sql_dynamic
+from app.sql.cost_guard import QueryCostExceeded
+from app.sql.dry_run import dry_run_sql, dry_run_to_http, schema_is_complete
+from app.core.precompute import (
+    metadata_version,
+    record_dashboard_hit,
+    get_precomputed_insights,
+    store_precomputed_insights,
+)
+from app.core.metrics import stage, record_cache, IN_FLIGHT
+from app.core.admission import (
+    AdmissionRejected,
+    rejection_to_http,
+    endpoint_controller,
+    generation_admission,
+    execution_admission,
+)
+from app.core.deadline import run_with_deadline, check_deadline, remaining_budget
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 # Initialize VectorStore & RAGAgent once (singleton)
 vector_store = VectorStore(persist_path=settings.VECTOR_STORE_PATH)
 rag_agent = RAGAgent(vector_store=vector_store)
 
+dashboard_insights_admission = endpoint_controller("dashboard_insights")
+
 
 @router.get("/insights/{dashboard_id}", response_model=Dict)
-def get_dashboard_insights(dashboard_id: int):
+async def get_dashboard_insights(dashboard_id: int, request: Request, llm: bool = False):
     """
-    Fetch dashboard metadata, build training pack, run RAG agent,
-    execute SQL dynamically, and return results + natural-language insight.
+    Serve precomputed insights for hot dashboards when available,
+    otherwise compute them on demand (and store for the next viewer).
+    Answers come from the dashboard's own chart SQL when possible; pass
+    ?llm=true to always generate with the LLM.
+    The pipeline runs under the request deadline and stops if the client disconnects.
+    """
+    return await run_with_deadline(request, _get_dashboard_insights, dashboard_id, llm)
+
+
+def _get_dashboard_insights(dashboard_id: int, use_llm: bool = False) -> Dict:
+    record_dashboard_hit(dashboard_id)
+    precomputed = get_precomputed_insights(dashboard_id)
+    # A fast-path answer does not satisfy an explicit LLM request
+    if precomputed is not None and use_llm and precomputed["result"].get("path") != "llm":
+        precomputed = None
+    record_cache("precomputed_insights", precomputed is not None)
+    if precomputed is not None:
+        return precomputed["result"]
+
+    try:
+        with dashboard_insights_admission.admit(), IN_FLIGHT.labels("insights").track_inprogress():
+            result = compute_dashboard_insights(dashboard_id, use_llm=use_llm)
+    except AdmissionRejected as e:
+        raise rejection_to_http(e)
+    # Not refreshed by the scheduler unless the dashboard turns hot: short TTL
+    store_precomputed_insights(dashboard_id, result, result["metadata_version"], precomputed=False)
+    return result
+
+
+def _find_dataset_uri(metadata_dict: Dict) -> Optional[str]:
+    """
+    SQLAlchemy URI of the first dashboard dataset with a database connection.
+    """
+    for dataset in metadata_dict.get("datasets", []):
+        uri = fetch_dataset_details(dataset["id"]).get("sqlalchemy_uri")
+        if uri:
+            return uri
+    return None
+
+
+def _chart_dataset_uri(metadata_dict: Dict, chart_id: int) -> Optional[str]:
+    """
+    SQLAlchemy URI of the database behind a chart's own dataset.
+    """
+    chart = next((c for c in metadata_dict.get("charts", []) if c.get("id") == chart_id), None)
+    if chart is None or chart.get("dataset_id") is None:
+        return None
+    return fetch_dataset_details(chart["dataset_id"]).get("sqlalchemy_uri")
+
+
+def _answer_from_chart_sql(training_pack: Dict, metadata_dict: Dict) -> Tuple[Optional[Dict], str]:
+    """
+    Fast path: run the dashboard's most representative chart query, against the
+    database of that chart's dataset, and describe the result.
+    Returns (result or None, reason for the path taken).
+    """
+    chart_query = select_chart_sql(training_pack.get("chart_sqls", []), limit=50)
+    if chart_query is None:
+        return None, "no_chart_sql"
+
+    try:
+        dataset_uri = _chart_dataset_uri(metadata_dict, chart_query.chart_id)
+    except Exception as e:
+        check_deadline("superset_fetch")
+        logger.warning("Dataset lookup for chart %s failed, falling back to LLM: %s", chart_query.chart_id, e)
+        return None, "no_chart_datasource"
+    if not dataset_uri:
+        return None, "no_chart_datasource"
+
+    try:
+        with execution_admission.admit(max_wait=remaining_budget(settings.ADMISSION_MAX_WAIT_SECONDS)):
+            query_results = execute_sql_dynamic(chart_query.sql, sqlalchemy_uri=dataset_uri, limit=50, timeout=15)
+    except AdmissionRejected as e:
+        raise rejection_to_http(e)
+    except Exception as e:
+        check_deadline("sql_execution")
+        logger.warning("Fast path query for chart %s failed, falling back to LLM: %s", chart_query.chart_id, e)
+        return None, "fast_path_failed"
+
+    with stage("fast_path_insight"):
+        insight_text = describe_rows(query_results)
+    return {"sql": chart_query.sql, "insight": insight_text, "rows": query_results}, "chart_sql"
+
+
+def compute_dashboard_insights(dashboard_id: int, use_llm: bool = False) -> Dict:
+    """
+    Fetch dashboard metadata, build training pack, answer from existing chart SQL
+    when possible, otherwise run RAG agent and execute its SQL dynamically,
+    and return results + natural-language insight.
+    use_llm forces the RAG agent path.
     """
     # -----------------------------
     # Step 1: Fetch metadata from Superset
     # -----------------------------
     try:
-        metadata_dict = fetch_dashboard_metadata(dashboard_id)
+        with stage("superset_fetch"):
+            metadata_dict = fetch_dashboard_metadata(dashboard_id)
         dashboard = Dashboard(**metadata_dict)
     except Exception as e:
+        check_deadline("superset_fetch")
         raise HTTPException(status_code=400, detail=f"Error fetching dashboard metadata: {str(e)}")
 
     # -----------------------------
     # Step 2: Build training pack & schema analysis
     # -----------------------------
-    training_pack = build_training_pack(metadata_dict)
-    schema_analysis = analyze_schema(dashboard.datasets)
+    with stage("training_pack"):
+        training_pack = build_training_pack(metadata_dict)
+        schema_analysis = analyze_schema([d.model_dump() for d in dashboard.datasets])
+
+    version = metadata_version(metadata_dict)
+
+    # -----------------------------
+    # Step 3: Fast path - answer from existing chart SQL without the LLM
+    # -----------------------------
+    path_start = time.perf_counter()
+    if use_llm:
+        reason = "requested"
+    elif not settings.FAST_PATH_ENABLED:
+        reason = "disabled"
+    else:
+        fast_result, reason = _answer_from_chart_sql(training_pack, metadata_dict)
+        if fast_result is not None:
+            record_insight_path("fast", reason)
+            observe_fast_path(time.perf_counter() - path_start)
+            return {
+                "dashboard_id": dashboard_id,
+                **fast_result,
+                "path": "fast",
+                "metadata_version": version
+            }
+    # Counted now so requests that then fail still show up in the path ratio
+    record_insight_path("llm", reason)
+
+    try:
+        dataset_uri = _find_dataset_uri(metadata_dict)
+    except Exception as e:
+        check_deadline("superset_fetch")
+        raise HTTPException(status_code=400, detail=f"Error fetching dataset details: {str(e)}")
+    if not dataset_uri:
+        raise HTTPException(status_code=400, detail="No dataset with database connection found")
 
     # -----------------------------
-    # Step 3: Add training pack documents to Vector Store
+    # Step 4: Add training pack documents to Vector Store
     # -----------------------------
-    for chart_sql in training_pack.get("chart_sqls", []):
-        doc_text = chart_sql.get("sql", "")
-        doc_id = f"chart_{chart_sql['chart_id']}"
-        embedding = get_embedding(doc_text)
-        vector_store.add_document(doc_id=doc_id, text=doc_text, embedding=embedding)
-    vector_store.persist()
+    with stage("embedding"):
+        for chart_sql in training_pack.get("chart_sqls", []):
+            check_deadline("embedding")
+            doc_text = chart_sql.get("sql", "")
+            embedding = get_embedding(doc_text)
+            vector_store.add_document(doc_id=doc_id(CHART_SQL, chart_sql["chart_id"]), text=doc_text, embedding=embedding)
+        vector_store.persist()
 
     # -----------------------------
-    # Step 4: Generate insight using RAG agent
+    # Step 5: Generate insight using RAG agent
     # -----------------------------
     try:
-        sql_query, insight_text = rag_agent.generate_insight(metadata_dict)
+        with generation_admission.admit(max_wait=remaining_budget(settings.ADMISSION_MAX_WAIT_SECONDS)):
+            sql_query, insight_text = rag_agent.generate_insight(metadata_dict)
+    except AdmissionRejected as e:
+        raise rejection_to_http(e)
     except Exception as e:
+        check_deadline("generation")
         raise HTTPException(status_code=500, detail=f"Error generating insight: {str(e)}")
 
     # -----------------------------
-    # Step 5: Execute SQL dynamically using dataset's DB URI
+    # Step 6: Dry run against the local schema replica (fails fast on unknown tables / columns)
     # -----------------------------
-    dataset_doc = next((d for d in build_training_documents(dashboard_id) if d.get("sqlalchemy_uri")), None)
-    if not dataset_doc:
-        raise HTTPException(status_code=400, detail="No dataset with database connection found")
-
-    dataset_uri = dataset_doc["sqlalchemy_uri"]
+    dry_run = dry_run_sql(
+        sql_query, dashboard_id, version, schema_analysis.columns,
+        complete=schema_is_complete(metadata_dict.get("datasets", [])),
+    )
+    if not dry_run.ok:
+        raise dry_run_to_http(sql_query, dry_run)
 
+    # -----------------------------
+    # Step 7: Execute SQL dynamically using dataset's DB URI
+    # -----------------------------
     try:
-        query_results = execute_sql_dynamic(sql_query, sqlalchemy_uri=dataset_uri, limit=50, timeout=15)
+        with execution_admission.admit(max_wait=remaining_budget(settings.ADMISSION_MAX_WAIT_SECONDS)):
+            query_results = execute_sql_dynamic(sql_query, sqlalchemy_uri=dataset_uri, limit=50, timeout=15)
+    except AdmissionRejected as e:
+        raise rejection_to_http(e)
+    except QueryCostExceeded as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
+        check_deadline("sql_execution")
         raise HTTPException(status_code=500, detail=f"Error executing SQL: {str(e)}")
+    observe_llm_path(time.perf_counter() - path_start)
 
     return {
         "dashboard_id": dashboard_id,
         "sql": sql_query,
         "insight": insight_text,
-        "rows": query_results
+        "rows": query_results,
+        "path": "llm",
+        "metadata_version": version
     }
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+from app.core.metrics import render_metrics
+
+router = APIRouter()
+
+@router.get("/metrics", tags=["metrics"])
+def metrics():
+    """
+    Prometheus metrics: per-stage latency histograms, cache hit/miss counters,
+    queue depths, LLM token counters and database pool usage.
+    """
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
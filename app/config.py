@@ -1,6 +1,6 @@
 # app/config.py
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import Field, model_validator
 from typing import Optional
 from pathlib import Path
 
@@ -8,6 +8,7 @@ class Settings(BaseSettings):
     # Superset
     SUPERSET_BASE_URL: str = Field(..., env="SUPERSET_BASE_URL")
     SUPERSET_API_KEY: str = Field(..., env="SUPERSET_API_KEY")
+    SUPERSET_TIMEOUT_SECONDS: float = Field(default=10.0, env="SUPERSET_TIMEOUT_SECONDS")
 
     # PostgreSQL
     POSTGRES_HOST: Optional[str] = Field(default=None, env="POSTGRES_HOST")
@@ -15,6 +16,8 @@ class Settings(BaseSettings):
     POSTGRES_DB: Optional[str] = Field(default=None, env="POSTGRES_DB")
     POSTGRES_USER: Optional[str] = Field(default=None, env="POSTGRES_USER")
     POSTGRES_PASSWORD: Optional[str] = Field(default=None, env="POSTGRES_PASSWORD")
+    # Full SQLAlchemy URI for execute_sql; overrides the POSTGRES_* settings when set
+    SQL_DATABASE_URI: Optional[str] = Field(default=None, env="SQL_DATABASE_URI")
 
     # Vector Store
     VECTOR_STORE_PATH: str = Field(default="./data/vector_db", env="VECTOR_STORE_PATH")
@@ -23,15 +26,94 @@ class Settings(BaseSettings):
     REDIS_HOST: str = Field(default="localhost", env="REDIS_HOST")
     REDIS_PORT: int = Field(default=6379, env="REDIS_PORT")
     REDIS_DB: int = Field(default=0, env="REDIS_DB")
+    REDIS_PASSWORD: Optional[str] = Field(default=None, env="REDIS_PASSWORD")
+
+    # SQL cost guard (EXPLAIN-based, see app/sql/cost_guard.py)
+    SQL_COST_GUARD_ENABLED: bool = Field(default=True, env="SQL_COST_GUARD_ENABLED")
+    SQL_MAX_PLAN_COST: float = Field(default=1e7, env="SQL_MAX_PLAN_COST")
+    SQL_SLOW_PLAN_COST: float = Field(default=1e6, env="SQL_SLOW_PLAN_COST")
+    SQL_MAX_PLAN_ROWS: float = Field(default=1e7, env="SQL_MAX_PLAN_ROWS")
+    SQL_GUARD_LIMIT: int = Field(default=20, env="SQL_GUARD_LIMIT")
+    SQL_SLOW_QUEUE_CONCURRENCY: int = Field(default=2, env="SQL_SLOW_QUEUE_CONCURRENCY")
+    SQL_SLOW_QUEUE_TIMEOUT: int = Field(default=60, env="SQL_SLOW_QUEUE_TIMEOUT")
+
+    # Answer from existing chart SQL before falling back to the LLM (see app/core/fast_path.py)
+    FAST_PATH_ENABLED: bool = Field(default=True, env="FAST_PATH_ENABLED")
+
+    # Dry run of generated SQL against a local schema replica (see app/sql/dry_run.py)
+    DRY_RUN_ENABLED: bool = Field(default=True, env="DRY_RUN_ENABLED")
+    DRY_RUN_CACHE_SIZE: int = Field(default=128, env="DRY_RUN_CACHE_SIZE")
+
+    # Background precompute of hot dashboards (see app/core/precompute.py)
+    PRECOMPUTE_ENABLED: bool = Field(default=False, env="PRECOMPUTE_ENABLED")
+    PRECOMPUTE_TOP_N: int = Field(default=20, env="PRECOMPUTE_TOP_N")
+    PRECOMPUTE_INTERVAL_SECONDS: int = Field(default=60, env="PRECOMPUTE_INTERVAL_SECONDS")
+    PRECOMPUTE_REFRESH_SECONDS: int = Field(default=1800, env="PRECOMPUTE_REFRESH_SECONDS")
+    PRECOMPUTE_TTL_SECONDS: int = Field(default=6 * 3600, env="PRECOMPUTE_TTL_SECONDS")
+    # Results computed on demand are not refreshed by the scheduler, so they expire quickly
+    PRECOMPUTE_ON_DEMAND_TTL_SECONDS: int = Field(default=300, env="PRECOMPUTE_ON_DEMAND_TTL_SECONDS")
+    # Upper bound on one refresh cycle; a worker that dies mid-cycle holds the cycle claim this long
+    PRECOMPUTE_CYCLE_LOCK_SECONDS: int = Field(default=900, env="PRECOMPUTE_CYCLE_LOCK_SECONDS")
+    PRECOMPUTE_CONCURRENCY: int = Field(default=1, env="PRECOMPUTE_CONCURRENCY")
+    PRECOMPUTE_CPU_FRACTION: float = Field(default=0.5, env="PRECOMPUTE_CPU_FRACTION")
+    PRECOMPUTE_NICE: int = Field(default=10, env="PRECOMPUTE_NICE")
+    PRECOMPUTE_HIT_DECAY: float = Field(default=0.5, env="PRECOMPUTE_HIT_DECAY")
+
+    # Admission control (see app/core/admission.py)
+    ADMISSION_GENERATION_CONCURRENCY: int = Field(default=1, env="ADMISSION_GENERATION_CONCURRENCY")
+    ADMISSION_GENERATION_QUEUE: int = Field(default=16, env="ADMISSION_GENERATION_QUEUE")
+    ADMISSION_EXECUTION_CONCURRENCY: int = Field(default=8, env="ADMISSION_EXECUTION_CONCURRENCY")
+    ADMISSION_EXECUTION_QUEUE: int = Field(default=32, env="ADMISSION_EXECUTION_QUEUE")
+    ADMISSION_ENDPOINT_CONCURRENCY: int = Field(default=32, env="ADMISSION_ENDPOINT_CONCURRENCY")
+    ADMISSION_MAX_WAIT_SECONDS: float = Field(default=30.0, env="ADMISSION_MAX_WAIT_SECONDS")
+
+    # Per-request deadline (see app/core/deadline.py); clients may lower or raise it
+    # with the header, up to REQUEST_DEADLINE_MAX_SECONDS
+    REQUEST_DEADLINE_SECONDS: float = Field(default=60.0, env="REQUEST_DEADLINE_SECONDS")
+    REQUEST_DEADLINE_MAX_SECONDS: float = Field(default=300.0, env="REQUEST_DEADLINE_MAX_SECONDS")
+    REQUEST_DEADLINE_HEADER: str = Field(default="X-Request-Timeout", env="REQUEST_DEADLINE_HEADER")
 
     # LLM Settings
+    EMBEDDING_MODEL_NAME: str = Field(default="sentence-transformers/all-MiniLM-L6-v2", env="EMBEDDING_MODEL_NAME")
     LLM_MODEL_NAME: str = Field(default="mistral-7b-instruct", env="LLM_MODEL_NAME")
     LLM_MAX_TOKENS: int = Field(default=1024, env="LLM_MAX_TOKENS")
+    # Optional draft model for assisted (speculative) decoding of greedy requests;
+    # must share LLM_MODEL_NAME's tokenizer. Schedule: "heuristic" or "constant"
+    LLM_DRAFT_MODEL_NAME: Optional[str] = Field(default=None, env="LLM_DRAFT_MODEL_NAME")
+    LLM_DRAFT_NUM_TOKENS: int = Field(default=5, env="LLM_DRAFT_NUM_TOKENS")
+    LLM_DRAFT_SCHEDULE: str = Field(default="heuristic", env="LLM_DRAFT_SCHEDULE")
+
+    # Shared model server (see app/llm/model_server.py); unset = models load in-process
+    MODEL_SERVER_SOCKET: Optional[str] = Field(default=None, env="MODEL_SERVER_SOCKET")
+    # Shared secret for the socket's HMAC handshake; required with MODEL_SERVER_SOCKET
+    MODEL_SERVER_AUTHKEY: Optional[str] = Field(default=None, env="MODEL_SERVER_AUTHKEY")
+    MODEL_SERVER_TIMEOUT: float = Field(default=300.0, env="MODEL_SERVER_TIMEOUT")
+    MODEL_SERVER_EMBED_BATCH: int = Field(default=64, env="MODEL_SERVER_EMBED_BATCH")
+    MODEL_SERVER_GENERATE_BATCH: int = Field(default=1, env="MODEL_SERVER_GENERATE_BATCH")
+    MODEL_SERVER_BATCH_WAIT_MS: float = Field(default=5.0, env="MODEL_SERVER_BATCH_WAIT_MS")
 
     # App Settings
     DEBUG: bool = Field(default=False, env="DEBUG")
+    TRACING_ENABLED: bool = Field(default=False, env="TRACING_ENABLED")
     LOG_LEVEL: str = Field(default="INFO", env="LOG_LEVEL")
 
+    @model_validator(mode="after")
+    def _require_model_server_authkey(self):
+        if self.MODEL_SERVER_SOCKET and not self.MODEL_SERVER_AUTHKEY:
+            raise ValueError("MODEL_SERVER_AUTHKEY must be set when MODEL_SERVER_SOCKET is set")
+        return self
+
+    @property
+    def database_uri(self) -> Optional[str]:
+        if self.SQL_DATABASE_URI:
+            return self.SQL_DATABASE_URI
+        if not self.POSTGRES_HOST:
+            return None
+        return (
+            f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+            f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        )
+
     class Config:
         # Load .env from the project root regardless of current working directory
         env_file = str(Path(__file__).resolve().parents[1] / ".env")
@@ -0,0 +1,176 @@
+"""
+Admission control for the LLM-bound and SQL-bound pipeline stages.
+
+Each AdmissionController caps concurrent work and keeps a bounded, priority
+ordered wait queue. A request is rejected up front (HTTP 429 + Retry-After)
+when the queue is full or its estimated wait (queue position x smoothed
+service time / concurrency) already exceeds its wait budget, instead of
+holding a worker thread until it times out.
+
+Priority lanes: interactive requests are admitted ahead of precompute, which
+is admitted ahead of bulk jobs. Background code selects its lane with
+`priority_lane(PRECOMPUTE)`.
+"""
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from fastapi import HTTPException
+from app.core.metrics import QUEUE_DEPTH, ADMISSION_REJECTIONS, ADMISSION_WAIT
+from app.core.deadline import current_deadline
+from app.config import settings
+
+INTERACTIVE = 0
+PRECOMPUTE = 1
+BULK = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", PRECOMPUTE: "precompute", BULK: "bulk"}
+
+_current_priority: contextvars.ContextVar[int] = contextvars.ContextVar("admission_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority_lane(priority: int):
+    """
+    Run the enclosed pipeline calls in the given priority lane.
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, controller: str, reason: str, retry_after: float):
+        super().__init__(f"{controller} is overloaded ({reason}); retry after {retry_after:.0f}s")
+        self.controller = controller
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def rejection_to_http(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+    )
+
+
+class AdmissionController:
+    """
+    Concurrency limit + bounded priority queue for one stage or endpoint.
+    max_queue=0 turns it into a plain in-flight cap with immediate rejection.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiters: list = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        # Smoothed seconds a request holds a slot; drives wait estimates
+        self._service_seconds = 0.0
+
+    def estimated_wait(self, priority: int) -> float:
+        with self._cond:
+            return self._estimate(priority)
+
+    def _estimate(self, priority: int) -> float:
+        ahead = sum(1 for p, _ in self._waiters if p <= priority)
+        return (ahead + 1) * self._service_seconds / self.max_concurrency
+
+    def _reject(self, reason: str, priority: int, retry_after: float):
+        ADMISSION_REJECTIONS.labels(self.name, reason, PRIORITY_NAMES.get(priority, str(priority))).inc()
+        raise AdmissionRejected(self.name, reason, retry_after or self._service_seconds or 1.0)
+
+    def _acquire(self, priority: int, max_wait: Optional[float]):
+        with self._cond:
+            if self._active < self.max_concurrency and not self._waiters:
+                self._active += 1
+                return
+
+            if len(self._waiters) >= self.max_queue:
+                self._reject("queue_full", priority, self._estimate(priority))
+            estimate = self._estimate(priority)
+            if max_wait is not None and estimate > max_wait:
+                self._reject("deadline", priority, estimate)
+
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            QUEUE_DEPTH.labels(f"admission_{self.name}").inc()
+            start = time.monotonic()
+            deadline = current_deadline()
+            try:
+                while not (self._active < self.max_concurrency and self._waiters[0] == entry):
+                    remaining = None if max_wait is None else max_wait - (time.monotonic() - start)
+                    if (remaining is not None and remaining <= 0) or (deadline is not None and deadline.cancelled):
+                        self._waiters.remove(entry)
+                        heapq.heapify(self._waiters)
+                        self._cond.notify_all()
+                        if deadline is not None:
+                            deadline.check(f"admission_{self.name}")
+                        self._reject("timeout", priority, self._estimate(priority))
+                    self._cond.wait(remaining)
+                heapq.heappop(self._waiters)
+                self._active += 1
+                # Another slot may still be free for the next waiter
+                self._cond.notify_all()
+            finally:
+                QUEUE_DEPTH.labels(f"admission_{self.name}").dec()
+
+    def _wake_waiters(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def _release(self, service_seconds: float):
+        with self._cond:
+            self._active -= 1
+            if self._service_seconds:
+                self._service_seconds = 0.8 * self._service_seconds + 0.2 * service_seconds
+            else:
+                self._service_seconds = service_seconds
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, priority: Optional[int] = None, max_wait: Optional[float] = None):
+        """
+        Hold a slot for the enclosed block, waiting at most `max_wait` seconds.
+        Raises AdmissionRejected when the request cannot be admitted in time,
+        or DeadlineExceeded when its request is cancelled while queued.
+        """
+        priority = _current_priority.get() if priority is None else priority
+        wait_start = time.perf_counter()
+        deadline = current_deadline()
+        if deadline is None:
+            self._acquire(priority, max_wait)
+        else:
+            # A cancelled request leaves the queue right away instead of waiting for a slot
+            with deadline.on_cancel(self._wake_waiters):
+                self._acquire(priority, max_wait)
+        admitted_at = time.perf_counter()
+        ADMISSION_WAIT.labels(self.name, PRIORITY_NAMES.get(priority, str(priority))).observe(admitted_at - wait_start)
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - admitted_at)
+
+
+generation_admission = AdmissionController(
+    "generation", settings.ADMISSION_GENERATION_CONCURRENCY, settings.ADMISSION_GENERATION_QUEUE
+)
+execution_admission = AdmissionController(
+    "execution", settings.ADMISSION_EXECUTION_CONCURRENCY, settings.ADMISSION_EXECUTION_QUEUE
+)
+
+
+def endpoint_controller(endpoint: str) -> AdmissionController:
+    """
+    In-flight cap for one endpoint (no queue: excess requests get 429 immediately).
+    """
+    return AdmissionController(f"endpoint_{endpoint}", settings.ADMISSION_ENDPOINT_CONCURRENCY, 0)
@@ -0,0 +1,204 @@
+"""
+Bulk, resumable ingestion of Superset dashboards into the vector store.
+
+Pipeline:
+1. Fetch stage (I/O): dashboard metadata + dataset details, fetched concurrently
+   by a thread pool.
+2. Embed stage (CPU): documents from finished fetches are embedded in batches.
+3. Store stage: each batch is upserted into the vector store and the dashboards
+   it completes are checkpointed, so an interrupted run resumes where it stopped.
+
+Usage:
+    python -m app.core.bulk_ingest --all
+    python -m app.core.bulk_ingest --dashboards 1 2 3 --workers 8 --batch-size 64
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+from app.core.metadata_extractor import (
+    fetch_dashboard_ids,
+    fetch_dashboard_metadata,
+    build_document_texts,
+    vector_store,
+)
+from app.llm.embeddings import get_embeddings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_PATH = "./data/ingest_checkpoint.json"
+
+
+@dataclass
+class IngestStats:
+    dashboards_done: int = 0
+    dashboards_skipped: int = 0
+    documents: int = 0
+    failures: Dict[int, str] = field(default_factory=dict)
+    fetch_seconds: float = 0.0  # summed across fetch workers
+    embed_seconds: float = 0.0
+    store_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.wall_seconds if self.wall_seconds else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            "dashboards_done": self.dashboards_done,
+            "dashboards_skipped": self.dashboards_skipped,
+            "documents": self.documents,
+            "failures": self.failures,
+            "docs_per_second": round(self.docs_per_second, 2),
+            "stage_seconds": {
+                "fetch": round(self.fetch_seconds, 3),
+                "embed": round(self.embed_seconds, 3),
+                "store": round(self.store_seconds, 3),
+            },
+            "wall_seconds": round(self.wall_seconds, 3),
+        }
+
+
+def load_checkpoint(path: str) -> Set[int]:
+    """
+    Return the dashboard IDs already ingested by a previous run.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return set(json.load(f).get("completed", []))
+
+
+def save_checkpoint(path: str, completed: Set[int]):
+    """
+    Atomically write the set of completed dashboard IDs.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"completed": sorted(completed)}, f)
+    os.replace(tmp_path, path)
+
+
+def _fetch_documents(dashboard_id: int) -> tuple[List[Dict], float]:
+    start = time.perf_counter()
+    metadata = fetch_dashboard_metadata(dashboard_id)
+    docs = build_document_texts(metadata)
+    return docs, time.perf_counter() - start
+
+
+def ingest_dashboards(
+    dashboard_ids: Optional[Iterable[int]] = None,
+    workers: int = 8,
+    batch_size: int = 64,
+    checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT_PATH,
+) -> IngestStats:
+    """
+    Ingest many dashboards (all of them when dashboard_ids is None).
+    Dashboards listed in the checkpoint file are skipped.
+    """
+    wall_start = time.perf_counter()
+    stats = IngestStats()
+
+    if dashboard_ids is None:
+        dashboard_ids = fetch_dashboard_ids()
+    completed = load_checkpoint(checkpoint_path) if checkpoint_path else set()
+    requested_ids = list(dict.fromkeys(dashboard_ids))
+    pending_ids = [d for d in requested_ids if d not in completed]
+    stats.dashboards_skipped = len(requested_ids) - len(pending_ids)
+
+    buffer: List[Dict] = []
+    buffered_dashboards: List[int] = []
+
+    def flush():
+        if not buffer:
+            return
+        embed_start = time.perf_counter()
+        embeddings = get_embeddings([doc["text"] for doc in buffer], batch_size=batch_size)
+        stats.embed_seconds += time.perf_counter() - embed_start
+
+        store_start = time.perf_counter()
+        vector_store.add_documents(
+            ids=[doc["id"] for doc in buffer],
+            texts=[doc["text"] for doc in buffer],
+            embeddings=embeddings
+        )
+        vector_store.persist()
+        stats.store_seconds += time.perf_counter() - store_start
+
+        stats.documents += len(buffer)
+        stats.dashboards_done += len(buffered_dashboards)
+        completed.update(buffered_dashboards)
+        if checkpoint_path:
+            save_checkpoint(checkpoint_path, completed)
+        logger.info(
+            "Ingested %d/%d dashboards, %d documents (%.1f docs/s)",
+            stats.dashboards_done, len(pending_ids), stats.documents,
+            stats.documents / (time.perf_counter() - wall_start),
+        )
+        buffer.clear()
+        buffered_dashboards.clear()
+
+    # Only a bounded window of fetches is in flight, so memory does not grow with the catalog
+    window = max(1, workers) * 2
+    next_ids = iter(pending_ids)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest-fetch") as pool:
+        futures = {}
+        while True:
+            for dashboard_id in next_ids:
+                futures[pool.submit(_fetch_documents, dashboard_id)] = dashboard_id
+                if len(futures) >= window:
+                    break
+            if not futures:
+                break
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                dashboard_id = futures.pop(future)
+                try:
+                    docs, fetch_seconds = future.result()
+                except Exception as e:
+                    logger.warning("Failed to fetch dashboard %s: %s", dashboard_id, e)
+                    stats.failures[dashboard_id] = str(e)
+                    continue
+                stats.fetch_seconds += fetch_seconds
+                buffer.extend(docs)
+                buffered_dashboards.append(dashboard_id)
+                if len(buffer) >= batch_size:
+                    flush()
+        flush()
+
+    stats.wall_seconds = time.perf_counter() - wall_start
+    return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest Superset dashboards into the vector store")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--all", action="store_true", help="Ingest every dashboard in Superset")
+    target.add_argument("--dashboards", type=int, nargs="+", help="Dashboard IDs to ingest")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent Superset fetches")
+    parser.add_argument("--batch-size", type=int, default=64, help="Documents per embedding batch")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="Checkpoint file for resuming")
+    parser.add_argument("--restart", action="store_true", help="Ignore and overwrite an existing checkpoint")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    stats = ingest_dashboards(
+        dashboard_ids=None if args.all else args.dashboards,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint,
+    )
+    print(json.dumps(stats.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Offline compaction of the vector store.
+
+1. Migrate every document to its canonical ID (app/llm/documents.py) and keep
+   one document per ID, dropping the duplicates older ID schemes left behind.
+2. Drop orphans: documents whose dashboard, chart or dataset no longer exists
+   in Superset. The listing only shows what the API key can see, so the step
+   is skipped when a resource lists no objects while the store holds documents
+   of that kind. Run --dry-run first: it reports the orphans it would drop.
+3. Rebuild the collection (and its index) from the surviving documents,
+   reusing their stored embeddings.
+
+Size and query latency are measured before and after. Latency probes are
+stored embeddings queried directly, so no embedding model is needed.
+Stop the API (and any bulk ingest) while this runs.
+
+Usage:
+    python -m app.core.compact_vector_store
+    python -m app.core.compact_vector_store --dry-run
+    python -m app.core.compact_vector_store --keep-orphans   # no Superset access
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+from app.core.metadata_extractor import fetch_object_ids, vector_store
+from app.llm.documents import DASHBOARD, CHART, CHART_SQL, DATASET, dedupe_documents, parse_doc_id
+from app.llm.vector_store import VectorStore
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Superset resource that owns each document kind
+KIND_RESOURCES = {DASHBOARD: "dashboard", CHART: "chart", CHART_SQL: "chart", DATASET: "dataset"}
+
+# Orphan IDs listed in the report
+ORPHAN_SAMPLE = 20
+
+
+@dataclass
+class CompactionReport:
+    documents_before: int = 0
+    documents_after: int = 0
+    duplicates_removed: int = 0
+    orphans_removed: int = 0
+    orphan_ids: List[str] = field(default_factory=list)
+    orphan_check_skipped: Optional[str] = None
+    ids_migrated: int = 0
+    unrecognized_ids: int = 0
+    documents_by_kind: Dict[str, int] = field(default_factory=dict)
+    bytes_before: int = 0
+    bytes_after: int = 0
+    latency_before: Dict[str, float] = field(default_factory=dict)
+    latency_after: Dict[str, float] = field(default_factory=dict)
+    dry_run: bool = False
+
+    def as_dict(self) -> Dict:
+        return {
+            "dry_run": self.dry_run,
+            "documents": {"before": self.documents_before, "after": self.documents_after},
+            "duplicates_removed": self.duplicates_removed,
+            "orphans_removed": self.orphans_removed,
+            "orphan_ids_sample": self.orphan_ids[:ORPHAN_SAMPLE],
+            "orphan_check_skipped": self.orphan_check_skipped,
+            "ids_migrated": self.ids_migrated,
+            "unrecognized_ids": self.unrecognized_ids,
+            "documents_by_kind": self.documents_by_kind,
+            "size_mb": {"before": round(self.bytes_before / 2**20, 2), "after": round(self.bytes_after / 2**20, 2)},
+            "query_latency_ms": {"before": self.latency_before, "after": self.latency_after},
+        }
+
+
+def directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def measure_query_latency(store: VectorStore, probes: List[List[float]], top_k: int = 5,
+                          rounds: int = 3) -> Dict[str, float]:
+    """
+    p50 / p95 latency of top-k queries for the probe embeddings.
+    """
+    if not probes:
+        return {}
+    samples = []
+    for _ in range(rounds):
+        for embedding in probes:
+            start = time.perf_counter()
+            store.query_embedding(embedding, top_k=top_k)
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "p50": round(samples[len(samples) // 2] * 1000, 3),
+        "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+    }
+
+
+def fetch_live_ids(kinds: Set[str]) -> Dict[str, Set[int]]:
+    """
+    Object IDs that still exist in Superset, per Superset resource.
+    """
+    resources = {KIND_RESOURCES[k] for k in kinds if k in KIND_RESOURCES}
+    return {resource: set(fetch_object_ids(resource)) for resource in resources}
+
+
+def find_orphans(parsed: Dict[str, Optional[Tuple[str, int]]],
+                 live: Dict[str, Set[int]]) -> Tuple[List[str], Optional[str]]:
+    """
+    Canonical IDs whose Superset object is not listed, or ([], reason) when the listing
+    cannot be trusted: a resource that lists nothing while documents of its kind are
+    stored means an API key that cannot see them, not that everything was deleted.
+    """
+    stored_resources = {KIND_RESOURCES[p[0]] for p in parsed.values() if p}
+    empty = sorted(resource for resource in stored_resources if not live.get(resource))
+    if empty:
+        return [], f"Superset listed no {', '.join(empty)} objects"
+    orphans = [canonical for canonical, p in parsed.items() if p and p[1] not in live[KIND_RESOURCES[p[0]]]]
+    return orphans, None
+
+
+def compact(store: VectorStore = vector_store, remove_orphans: bool = True, dry_run: bool = False,
+            probe_count: int = 50) -> CompactionReport:
+    report = CompactionReport(dry_run=dry_run)
+    persist_path = settings.VECTOR_STORE_PATH
+
+    documents = list(store.iter_documents())
+    report.documents_before = len(documents)
+    report.bytes_before = directory_size(persist_path)
+
+    # --- Dedupe by canonical ID; a document already stored under it wins
+    kept, report.unrecognized_ids = dedupe_documents(documents)
+    report.duplicates_removed = len(documents) - len(kept)
+
+    # --- Drop documents whose Superset object is gone
+    if remove_orphans:
+        parsed = {canonical: parse_doc_id(canonical) for canonical in kept}
+        live = fetch_live_ids({p[0] for p in parsed.values() if p})
+        report.orphan_ids, report.orphan_check_skipped = find_orphans(parsed, live)
+        if report.orphan_check_skipped:
+            logger.warning("Skipping orphan removal: %s", report.orphan_check_skipped)
+        else:
+            logger.info("%d orphan documents%s", len(report.orphan_ids), "" if dry_run else " will be removed")
+        for canonical in report.orphan_ids:
+            del kept[canonical]
+        report.orphans_removed = len(report.orphan_ids)
+
+    report.documents_after = len(kept)
+    report.ids_migrated = sum(1 for canonical, doc in kept.items() if doc["id"] != canonical)
+    report.documents_by_kind = dict(Counter((parse_doc_id(c) or ("unknown",))[0] for c in kept))
+
+    # Probe with embeddings of surviving documents, spread across the collection
+    survivors = list(kept.values())
+    step = max(1, len(survivors) // probe_count) if probe_count else 1
+    probes = [doc["embedding"] for doc in survivors[::step][:probe_count]]
+    report.latency_before = measure_query_latency(store, probes)
+
+    if dry_run:
+        return report
+
+    store.rebuild([
+        {"id": canonical, "text": doc["text"], "embedding": doc["embedding"]}
+        for canonical, doc in kept.items()
+    ])
+    report.bytes_after = directory_size(persist_path)
+    report.latency_after = measure_query_latency(store, probes)
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Deduplicate, prune and rebuild the vector store")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without rewriting")
+    parser.add_argument("--keep-orphans", action="store_true", help="Skip the Superset orphan check")
+    parser.add_argument("--probes", type=int, default=50, help="Number of latency probe queries")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    report = compact(remove_orphans=not args.keep_orphans, dry_run=args.dry_run, probe_count=args.probes)
+    print(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Per-request deadlines and cancellation.
+
+The API edge creates one Deadline per request (from the X-Request-Timeout
+header, else REQUEST_DEADLINE_SECONDS) and runs the pipeline under it with
+`run_with_deadline`. Stages never hold a fixed timeout of their own: they
+size it with `remaining_budget(cap)` and call `check_deadline(stage)` before
+starting expensive work.
+
+A deadline is cancelled when it expires or the client disconnects.
+Cancelling runs the abort callbacks registered with `Deadline.on_cancel`
+(e.g. cancelling the running DB query server side); stages that cannot be
+interrupted are bounded by the remaining budget instead.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from app.core.metrics import REQUEST_ABORTS
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_EXCEEDED = "deadline_exceeded"
+CLIENT_DISCONNECTED = "client_disconnected"
+
+# How often the request coroutine checks for a client disconnect
+DISCONNECT_POLL_SECONDS = 0.25
+
+
+class DeadlineExceeded(RuntimeError):
+    def __init__(self, reason: str, stage: str):
+        super().__init__(f"Request aborted ({reason}) at {stage}")
+        self.reason = reason
+        self.stage = stage
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.cancel_reason: Optional[str] = None
+        # Reentrant: callbacks run under it and may touch the deadline
+        self._lock = threading.RLock()
+        self._callbacks: Dict[int, Callable[[], Any]] = {}
+        self._next_id = 0
+
+    def remaining(self) -> float:
+        if self.cancel_reason is not None:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_reason is not None
+
+    def cancel(self, reason: str):
+        """
+        Mark the request as abandoned and run the registered abort callbacks.
+        Callbacks may block; do not call this on the event loop.
+        """
+        with self._lock:
+            if self.cancel_reason is not None:
+                return
+            self.cancel_reason = reason
+            REQUEST_ABORTS.labels(reason).inc()
+            # Run under the lock: an on_cancel block cannot exit (e.g. return its pooled
+            # connection for another request to use) while its callback is still running
+            for callback in list(self._callbacks.values()):
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("Deadline abort callback failed")
+
+    def check(self, stage: str):
+        if self.cancel_reason is None and time.monotonic() >= self.expires_at:
+            self.cancel(DEADLINE_EXCEEDED)
+        if self.cancel_reason is not None:
+            raise DeadlineExceeded(self.cancel_reason, stage)
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], Any]):
+        """
+        Call `callback` if the deadline is cancelled while the block runs.
+        Leaving the block waits for a callback already running, and no callback runs after it.
+        """
+        with self._lock:
+            callback_id = self._next_id
+            self._next_id += 1
+            self._callbacks[callback_id] = callback
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.pop(callback_id, None)
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]):
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def check_deadline(stage: str):
+    """
+    Raise DeadlineExceeded if the current request's deadline expired or was cancelled.
+    """
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def remaining_budget(cap: Optional[float] = None, stage: str = "") -> Optional[float]:
+    """
+    Seconds a stage may spend: the remaining request budget, bounded by `cap`.
+    Without a request deadline (background jobs) this is just `cap`.
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return cap
+    deadline.check(stage or "budget")
+    remaining = deadline.remaining()
+    return remaining if cap is None else min(cap, remaining)
+
+
+def deadline_from_request(request: Request) -> Deadline:
+    seconds = settings.REQUEST_DEADLINE_SECONDS
+    header = request.headers.get(settings.REQUEST_DEADLINE_HEADER)
+    if header:
+        try:
+            seconds = float(header)
+        except ValueError:
+            pass
+    return Deadline(min(max(seconds, 0.0), settings.REQUEST_DEADLINE_MAX_SECONDS))
+
+
+def deadline_to_http(e: DeadlineExceeded) -> HTTPException:
+    # 499 (client closed request) is never seen by the client; it shows up in access logs
+    status_code = 499 if e.reason == CLIENT_DISCONNECTED else 504
+    return HTTPException(status_code=status_code, detail=str(e))
+
+
+async def run_with_deadline(request: Request, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a blocking pipeline function in the threadpool under a request deadline,
+    cancelling it when the client disconnects or the deadline passes.
+    """
+    deadline = deadline_from_request(request)
+
+    def call():
+        with deadline_scope(deadline):
+            return fn(*args)
+
+    loop = asyncio.get_running_loop()
+    work = asyncio.ensure_future(run_in_threadpool(call))
+    while not deadline.cancelled:
+        done, _ = await asyncio.wait({work}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            break
+        # Abort callbacks may block (e.g. a psycopg cancel round trip): keep them off the event loop
+        if await request.is_disconnected():
+            await loop.run_in_executor(None, deadline.cancel, CLIENT_DISCONNECTED)
+        elif deadline.remaining() <= 0:
+            await loop.run_in_executor(None, deadline.cancel, DEADLINE_EXCEEDED)
+    try:
+        # After a cancel the worker stops at its next check or aborted call
+        return await work
+    except DeadlineExceeded as e:
+        raise deadline_to_http(e)
@@ -0,0 +1,183 @@
+"""
+Rule-based fast path for dashboard insights.
+
+Most dashboards already hold the query a viewer needs: the SQL of their
+charts, collected by build_training_pack into "chart_sqls". The fast path
+picks the most representative chart query, makes it safe to run (parameter
+cleanup, read-only check, LIMIT), and describes its result with a templated
+insight computed from column statistics. The LLM path runs only when no
+chart query qualifies or the caller asks for it.
+"""
+import re
+import threading
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.sql.analysis import analyze_sql
+from app.sql.parser import clean_query
+from app.sql.validator import validate_sql
+from app.sql.cost_guard import tighten_limit
+from app.core.metrics import INSIGHT_PATH, FAST_PATH_SECONDS_SAVED
+
+# Unrendered Jinja templating or bind parameters: the query cannot run as-is
+_UNRESOLVED_PARAMS = re.compile(r"\{\{.*?\}\}|\{%.*?%\}|%\(\w+\)s|(?<![:\w]):[A-Za-z_]\w*", re.S)
+_GROUP_BY = re.compile(r"\bGROUP\s+BY\b", re.I)
+
+
+@dataclass(frozen=True)
+class ChartQuery:
+    chart_id: int
+    sql: str
+
+
+def prepare_chart_sql(sql: str, limit: int) -> Optional[str]:
+    """
+    Return a single, read-only, row-bounded version of a chart query, or None if it cannot be made safe.
+    """
+    if not sql or _UNRESOLVED_PARAMS.search(sql):
+        return None
+    query = clean_query(sql)
+    if not query or analyze_sql(query).statement_count != 1:
+        return None
+    query = tighten_limit(query, limit)
+    is_valid, _ = validate_sql(query)
+    return query if is_valid else None
+
+
+def select_chart_sql(chart_sqls: List[Dict], limit: int = 50) -> Optional[ChartQuery]:
+    """
+    Pick the chart query most representative of the dashboard: the one over the tables
+    most charts use, preferring aggregates, then fewer tables, then shorter SQL.
+    """
+    candidates = []
+    for chart_sql in chart_sqls:
+        query = prepare_chart_sql(chart_sql.get("sql", ""), limit)
+        if query is not None:
+            candidates.append((chart_sql.get("chart_id"), query, analyze_sql(query).tables))
+    if not candidates:
+        return None
+
+    table_counts: Dict[str, int] = {}
+    for _, _, tables in candidates:
+        for table in set(tables):
+            table_counts[table] = table_counts.get(table, 0) + 1
+
+    def score(candidate):
+        _, query, tables = candidate
+        coverage = sum(table_counts[t] for t in set(tables))
+        return coverage, bool(_GROUP_BY.search(query)), -len(tables), -len(query)
+
+    chart_id, query, _ = max(candidates, key=score)
+    return ChartQuery(chart_id=chart_id, sql=query)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def summarize_rows(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Column statistics for a query result: numeric columns as float arrays (NaN for NULL),
+    plus the first non-numeric column as the dimension.
+    """
+    summary: Dict[str, Any] = {"row_count": len(rows), "metrics": {}, "dimension": None}
+    if not rows:
+        return summary
+
+    columns = list(rows[0].keys())
+    dimension_values = None
+    for column in columns:
+        values = [row.get(column) for row in rows]
+        present = [v for v in values if v is not None]
+        if present and all(_is_number(v) for v in present):
+            array = np.array([np.nan if v is None else float(v) for v in values], dtype=float)
+            if np.isnan(array).all():
+                continue
+            summary["metrics"][column] = {
+                "sum": float(np.nansum(array)),
+                "mean": float(np.nanmean(array)),
+                "min": float(np.nanmin(array)),
+                "max": float(np.nanmax(array)),
+                "argmax": int(np.nanargmax(array)),
+            }
+        elif summary["dimension"] is None:
+            summary["dimension"] = column
+            dimension_values = values
+
+    summary["dimension_values"] = dimension_values
+    return summary
+
+
+def _fmt(value: float) -> str:
+    return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}"
+
+
+def render_insight(summary: Dict[str, Any]) -> str:
+    """
+    Templated natural-language description of summarize_rows output.
+    """
+    row_count = summary["row_count"]
+    if row_count == 0:
+        return "The query returned no rows."
+
+    metrics = summary["metrics"]
+    dimension = summary["dimension"]
+    sentences = [f"The query returned {row_count} row{'s' if row_count != 1 else ''}."]
+    if not metrics:
+        sentences.append("It has no numeric columns to summarize.")
+        return " ".join(sentences)
+
+    # Lead with the first metric that is not an identifier
+    lead = next((m for m in metrics if m.lower() != "id" and not m.lower().endswith("_id")), next(iter(metrics)))
+    stats = metrics[lead]
+    if row_count == 1:
+        sentences.append(f"{lead} is {_fmt(stats['sum'])}.")
+    else:
+        sentences.append(
+            f"{lead} totals {_fmt(stats['sum'])} (average {_fmt(stats['mean'])}, "
+            f"range {_fmt(stats['min'])} to {_fmt(stats['max'])})."
+        )
+        if dimension is not None:
+            top_label = summary["dimension_values"][stats["argmax"]]
+            share = stats["max"] / stats["sum"] if stats["sum"] > 0 and stats["min"] >= 0 else None
+            top = f"The highest {lead} is for {dimension} {top_label} at {_fmt(stats['max'])}"
+            sentences.append(top + (f" ({share:.0%} of the total)." if share is not None else "."))
+
+    others = [m for m in metrics if m != lead][:2]
+    for metric in others:
+        sentences.append(f"{metric} totals {_fmt(metrics[metric]['sum'])}.")
+    return " ".join(sentences)
+
+
+def describe_rows(rows: List[Dict[str, Any]]) -> str:
+    return render_insight(summarize_rows(rows))
+
+
+# Smoothed latency of the LLM path, used to estimate the time the fast path saves
+_llm_path_seconds = 0.0
+_llm_path_lock = threading.Lock()
+
+
+def record_insight_path(path: str, reason: str):
+    """
+    Count the path chosen for a computation, when the choice is made (whether or not it then succeeds).
+    """
+    INSIGHT_PATH.labels(path, reason).inc()
+
+
+def observe_llm_path(seconds: float):
+    global _llm_path_seconds
+    with _llm_path_lock:
+        if _llm_path_seconds:
+            _llm_path_seconds = 0.8 * _llm_path_seconds + 0.2 * seconds
+        else:
+            _llm_path_seconds = seconds
+
+
+def observe_fast_path(seconds: float):
+    with _llm_path_lock:
+        estimate = _llm_path_seconds
+    # Nothing is counted until the LLM path has been observed at least once
+    if estimate > seconds:
+        FAST_PATH_SECONDS_SAVED.inc(estimate - seconds)
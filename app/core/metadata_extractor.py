@@ -1,6 +1,8 @@
 from typing import Dict, List
 from app.llm.vector_store import VectorStore
-from app.llm.embeddings import get_embedding
+from app.llm.embeddings import get_embeddings
+from app.llm.documents import DASHBOARD, CHART, DATASET, doc_id
+from app.core.deadline import remaining_budget
 from app.config import settings
 import requests
 import json
@@ -11,13 +13,18 @@ SUPERSET_API_KEY = settings.SUPERSET_API_KEY    # Bearer token
 vector_store = VectorStore(persist_path=settings.VECTOR_STORE_PATH)
 
 
+def _superset_timeout() -> float:
+    # Bounded by the remaining request budget when called from the API
+    return remaining_budget(settings.SUPERSET_TIMEOUT_SECONDS, stage="superset_fetch")
+
+
 def fetch_dashboard_metadata(dashboard_id: int) -> Dict:
     """
     Fetch dashboard metadata from Superset API
     """
     headers = {"Authorization": f"Bearer {SUPERSET_API_KEY}"}
     url = f"{SUPSERSET_API_BASE}/dashboard/{dashboard_id}"
-    resp = requests.get(url, headers=headers)
+    resp = requests.get(url, headers=headers, timeout=_superset_timeout())
     if resp.status_code != 200:
         raise Exception(f"Failed to fetch dashboard {dashboard_id}: {resp.text}")
     return resp.json()
@@ -30,7 +37,7 @@ def fetch_dataset_details(dataset_id: int) -> Dict:
     """
     headers = {"Authorization": f"Bearer {SUPERSET_API_KEY}"}
     url = f"{SUPSERSET_API_BASE}/dataset/{dataset_id}"
-    resp = requests.get(url, headers=headers)
+    resp = requests.get(url, headers=headers, timeout=_superset_timeout())
     if resp.status_code != 200:
         raise Exception(f"Failed to fetch dataset {dataset_id}: {resp.text}")
     data = resp.json()
@@ -40,10 +47,42 @@ def fetch_dataset_details(dataset_id: int) -> Dict:
     return data
 
 
-def build_training_documents(dashboard_metadata: Dict) -> List[Dict]:
+def fetch_object_ids(resource: str, page_size: int = 100) -> List[int]:
     """
-    Build training documents from dashboard metadata for Vector Store
-    Each document is a dict: {"id": str, "text": str, "embedding": List[float]}
+    Fetch the IDs of all objects of a resource ("dashboard", "chart", "dataset")
+    visible to the API key, following pagination
+    """
+    headers = {"Authorization": f"Bearer {SUPERSET_API_KEY}"}
+    url = f"{SUPSERSET_API_BASE}/{resource}/"
+    ids: List[int] = []
+    page = 0
+    while True:
+        params = {"q": f"(columns:!(id),page:{page},page_size:{page_size})"}
+        resp = requests.get(url, headers=headers, params=params, timeout=_superset_timeout())
+        if resp.status_code != 200:
+            raise Exception(f"Failed to list {resource}s: {resp.text}")
+        body = resp.json()
+        result = body.get("result", [])
+        ids.extend(item["id"] for item in result)
+        if len(result) < page_size:
+            # A short page before the reported total means the listing was cut off
+            if len(ids) < body.get("count", len(ids)):
+                raise Exception(f"Incomplete {resource} listing: got {len(ids)} of {body['count']}")
+            return ids
+        page += 1
+
+
+def fetch_dashboard_ids(page_size: int = 100) -> List[int]:
+    """
+    Fetch the IDs of all dashboards visible to the API key
+    """
+    return fetch_object_ids("dashboard", page_size)
+
+
+def build_document_texts(dashboard_metadata: Dict) -> List[Dict]:
+    """
+    Build training documents without embeddings (I/O stage).
+    Each document is a dict: {"id": str, "text": str}
     Also attach sqlalchemy_uri to dataset docs for executor
     """
     docs = []
@@ -53,43 +92,48 @@ def build_training_documents(dashboard_metadata: Dict) -> List[Dict]:
 
     # Add dashboard-level doc
     dashboard_text = json.dumps({"dashboard_id": dashboard_id, "charts": [c["id"] for c in charts]})
-    docs.append({
-        "id": f"dashboard-{dashboard_id}",
-        "text": dashboard_text,
-        "embedding": get_embedding(dashboard_text)
-    })
+    docs.append({"id": doc_id(DASHBOARD, dashboard_id), "text": dashboard_text})
 
     # Add charts
     for chart in charts:
-        chart_text = json.dumps(chart)
-        docs.append({
-            "id": f"chart-{chart['id']}",
-            "text": chart_text,
-            "embedding": get_embedding(chart_text)
-        })
+        docs.append({"id": doc_id(CHART, chart["id"]), "text": json.dumps(chart)})
 
     # Add datasets with sqlalchemy_uri
     for dataset in datasets:
         dataset_id = dataset["id"]
         dataset_details = fetch_dataset_details(dataset_id)
-        dataset_text = json.dumps(dataset_details)
         docs.append({
-            "id": f"dataset-{dataset_id}",
-            "text": dataset_text,
-            "embedding": get_embedding(dataset_text),
+            "id": doc_id(DATASET, dataset_id),
+            "text": json.dumps(dataset_details),
             "sqlalchemy_uri": dataset_details.get("sqlalchemy_uri")
         })
 
     return docs
 
 
+def build_training_documents(dashboard_metadata: Dict) -> List[Dict]:
+    """
+    Build training documents from dashboard metadata for Vector Store
+    Each document is a dict: {"id": str, "text": str, "embedding": List[float]}
+    Also attach sqlalchemy_uri to dataset docs for executor
+    """
+    docs = build_document_texts(dashboard_metadata)
+    embeddings = get_embeddings([doc["text"] for doc in docs])
+    for doc, embedding in zip(docs, embeddings):
+        doc["embedding"] = embedding
+    return docs
+
+
 def ingest_dashboard(dashboard_id: int):
     """
     Full ingestion pipeline: fetch metadata → build docs → store embeddings
     """
     metadata = fetch_dashboard_metadata(dashboard_id)
     docs = build_training_documents(metadata)
-    for doc in docs:
-        vector_store.add_document(doc["id"], doc["text"], doc["embedding"])
+    vector_store.add_documents(
+        ids=[doc["id"] for doc in docs],
+        texts=[doc["text"] for doc in docs],
+        embeddings=[doc["embedding"] for doc in docs]
+    )
     vector_store.persist()
     print(f"Ingested {len(docs)} documents for dashboard {dashboard_id}")
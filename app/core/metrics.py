@@ -0,0 +1,168 @@
+"""
+Prometheus metrics and optional trace spans for the insights pipeline.
+
+Use `stage(name)` around a pipeline step to record its latency:
+
+    with stage("superset_fetch"):
+        metadata = fetch_dashboard_metadata(dashboard_id)
+
+Spans are emitted only when TRACING_ENABLED is set and opentelemetry is installed.
+"""
+import time
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from app.config import settings
+
+try:
+    from opentelemetry import trace
+    _tracer = trace.get_tracer("openpulse") if settings.TRACING_ENABLED else None
+except ImportError:
+    _tracer = None
+
+# Pipeline stages: superset_fetch, training_pack, embedding, retrieval,
+# llm_prefill, llm_decode, sql_validation, sql_explain, sql_execution
+STAGE_SECONDS = Histogram(
+    "openpulse_stage_seconds",
+    "Latency of insights pipeline stages",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+CACHE_REQUESTS = Counter(
+    "openpulse_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+
+QUEUE_DEPTH = Gauge(
+    "openpulse_queue_depth",
+    "Work items waiting in a queue",
+    ["queue"],
+)
+
+IN_FLIGHT = Gauge(
+    "openpulse_in_flight_requests",
+    "Requests currently being processed",
+    ["endpoint"],
+)
+
+ADMISSION_REJECTIONS = Counter(
+    "openpulse_admission_rejections_total",
+    "Requests rejected by admission control",
+    ["controller", "reason", "priority"],
+)
+
+ADMISSION_WAIT = Histogram(
+    "openpulse_admission_wait_seconds",
+    "Time spent queued before admission",
+    ["controller", "priority"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+REQUEST_ABORTS = Counter(
+    "openpulse_request_aborts_total",
+    "Requests abandoned mid-pipeline, by reason (deadline_exceeded / client_disconnected)",
+    ["reason"],
+)
+
+INSIGHT_PATH = Counter(
+    "openpulse_insight_path_total",
+    "Insight computations by answering path (fast / llm) and reason",
+    ["path", "reason"],
+)
+
+FAST_PATH_SECONDS_SAVED = Counter(
+    "openpulse_fast_path_seconds_saved_total",
+    "Estimated latency avoided by answering from chart SQL instead of the LLM",
+)
+
+LLM_TOKENS = Counter(
+    "openpulse_llm_tokens_total",
+    "Tokens processed by the local LLM",
+    ["phase"],  # prompt / generated
+)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a pipeline stage into STAGE_SECONDS (and a trace span when enabled).
+    """
+    start = time.perf_counter()
+    if _tracer is None:
+        try:
+            yield
+        finally:
+            STAGE_SECONDS.labels(name).observe(time.perf_counter() - start)
+        return
+
+    with _tracer.start_as_current_span(name):
+        try:
+            yield
+        finally:
+            STAGE_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+
+def record_generation(stats: dict):
+    """
+    Record prefill/decode latency and token counts from app.llm.generation stats.
+    """
+    STAGE_SECONDS.labels("llm_prefill").observe(stats["prefill_seconds"])
+    STAGE_SECONDS.labels("llm_decode").observe(stats["decode_seconds"])
+    LLM_TOKENS.labels("prompt").inc(stats["prompt_tokens"])
+    LLM_TOKENS.labels("generated").inc(stats["generated_tokens"])
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class _RuntimeCollector:
+    """
+    Reads state that is cheap to sample at scrape time instead of on every request:
+    the SQL analysis LRU and the pooled database engines.
+    """
+
+    def describe(self):
+        # Skip the registration-time collect() (it would import the executor mid-import)
+        return []
+
+    def collect(self):
+        # Imported lazily to keep this module import-light
+        from app.sql.analysis import analyze_sql
+        from app.sql.executor import pooled_engines
+
+        info = analyze_sql.cache_info()
+        lookups = CounterMetricFamily(
+            "openpulse_sql_analysis_cache_lookups",
+            "SQL analysis LRU lookups by result",
+            labels=["result"],
+        )
+        lookups.add_metric(["hit"], info.hits)
+        lookups.add_metric(["miss"], info.misses)
+        yield lookups
+
+        size = GaugeMetricFamily("openpulse_db_pool_size", "Configured pool size per database", labels=["database"])
+        checked_out = GaugeMetricFamily("openpulse_db_pool_checked_out", "Connections in use per database", labels=["database"])
+        overflow = GaugeMetricFamily("openpulse_db_pool_overflow", "Overflow connections per database", labels=["database"])
+        for engine in pooled_engines():
+            pool = engine.pool
+            database = engine.url.render_as_string(hide_password=True)
+            if hasattr(pool, "checkedout"):
+                size.add_metric([database], pool.size())
+                checked_out.add_metric([database], pool.checkedout())
+                overflow.add_metric([database], pool.overflow())
+        yield size
+        yield checked_out
+        yield overflow
+
+
+REGISTRY.register(_RuntimeCollector())
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Return the Prometheus exposition payload and its content type.
+    """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,241 @@
+"""
+Background precompute of insights for hot dashboards.
+
+Every /insights/{dashboard_id} request bumps a per-dashboard hit score in Redis
+(a sorted set decayed each cycle). The scheduler periodically takes the top-N
+dashboards and recomputes their insights when the stored result is missing,
+older than PRECOMPUTE_REFRESH_SECONDS, or the dashboard metadata changed.
+Results are stored in Redis where the insights endpoint serves them directly.
+Results computed on demand for other dashboards are stored too, but only for
+PRECOMPUTE_ON_DEMAND_TTL_SECONDS since nothing refreshes them when the
+dashboard changes.
+
+Runs inside the API process (PRECOMPUTE_ENABLED=true) or as a sidecar:
+    python -m app.core.precompute
+Every API worker then runs a scheduler, but a Redis claim (SET NX PX) lets one
+of them run each cycle, so hits decay and dashboards refresh once per interval
+whatever the worker count.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from app.db.cache import redis_client, get_cache, set_cache
+from app.core.metrics import QUEUE_DEPTH
+from app.core.admission import priority_lane, PRECOMPUTE
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+HITS_KEY = "insights:hits"
+RESULT_KEY = "insights:precomputed:{dashboard_id}"
+CYCLE_KEY = "insights:precompute:cycle"
+
+
+def metadata_version(metadata: Dict) -> str:
+    """
+    Stable hash of dashboard metadata; changes whenever Superset metadata changes.
+    """
+    payload = json.dumps(metadata, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def record_dashboard_hit(dashboard_id: int):
+    """
+    Count a live request for a dashboard. Never fails the request.
+    """
+    try:
+        redis_client.zincrby(HITS_KEY, 1, str(dashboard_id))
+    except Exception as e:
+        logger.debug("Failed to record hit for dashboard %s: %s", dashboard_id, e)
+
+
+def top_dashboards(n: int) -> List[int]:
+    """
+    Return the N dashboards with the highest (decayed) request counts.
+    """
+    return [int(member) for member in redis_client.zrevrange(HITS_KEY, 0, n - 1)]
+
+
+def decay_dashboard_hits(factor: float):
+    """
+    Scale all hit scores by `factor` so popularity tracks recent traffic.
+    """
+    redis_client.zunionstore(HITS_KEY, {HITS_KEY: factor})
+    redis_client.zremrangebyscore(HITS_KEY, 0, 0.01)
+
+
+def get_precomputed_insights(dashboard_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Return the stored entry {"result", "version", "computed_at", "precomputed"} or None.
+    """
+    try:
+        return get_cache(RESULT_KEY.format(dashboard_id=dashboard_id))
+    except Exception as e:
+        logger.debug("Failed to read precomputed insights for %s: %s", dashboard_id, e)
+        return None
+
+
+def store_precomputed_insights(dashboard_id: int, result: Dict[str, Any], version: str,
+                               precomputed: bool = True, computed_at: Optional[float] = None):
+    """
+    Store insights for a dashboard. Entries kept fresh by the scheduler (precomputed)
+    live for PRECOMPUTE_TTL_SECONDS, on-demand results for PRECOMPUTE_ON_DEMAND_TTL_SECONDS.
+    """
+    entry = {
+        "result": result,
+        "version": version,
+        "computed_at": time.time() if computed_at is None else computed_at,
+        "precomputed": precomputed,
+    }
+    ttl = settings.PRECOMPUTE_TTL_SECONDS if precomputed else settings.PRECOMPUTE_ON_DEMAND_TTL_SECONDS
+    try:
+        set_cache(RESULT_KEY.format(dashboard_id=dashboard_id), entry, expire_seconds=ttl)
+    except Exception as e:
+        logger.warning("Failed to store precomputed insights for %s: %s", dashboard_id, e)
+
+
+def _lower_thread_priority():
+    """
+    Renice the current worker thread (Linux) so live traffic wins the CPU.
+    """
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), settings.PRECOMPUTE_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+class PrecomputeScheduler:
+    """
+    Periodically recomputes insights for the top-N hot dashboards.
+    CPU use is bounded by PRECOMPUTE_CONCURRENCY worker threads, a nice level,
+    and a duty cycle (PRECOMPUTE_CPU_FRACTION) that idles after each job.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._token = uuid.uuid4().hex
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._pool = ThreadPoolExecutor(
+            max_workers=settings.PRECOMPUTE_CONCURRENCY,
+            thread_name_prefix="precompute",
+            initializer=_lower_thread_priority,
+        )
+        self._thread = threading.Thread(target=self._run, name="precompute-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("Precompute scheduler started (top %d dashboards)", settings.PRECOMPUTE_TOP_N)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_cycle()
+            except Exception as e:
+                logger.warning("Precompute cycle failed: %s", e)
+            self._stop.wait(settings.PRECOMPUTE_INTERVAL_SECONDS)
+
+    def _claim_cycle(self) -> bool:
+        """
+        Claim the next cycle across all schedulers sharing this Redis.
+        """
+        return bool(redis_client.set(
+            CYCLE_KEY, self._token, nx=True, px=settings.PRECOMPUTE_CYCLE_LOCK_SECONDS * 1000,
+        ))
+
+    def _end_cycle(self):
+        # Keep the claim for one interval after the cycle, so the next one starts no earlier
+        # than a single scheduler's would
+        try:
+            redis_client.set(CYCLE_KEY, self._token, xx=True, px=settings.PRECOMPUTE_INTERVAL_SECONDS * 1000)
+        except Exception as e:
+            logger.warning("Failed to renew precompute cycle claim: %s", e)
+
+    def run_cycle(self):
+        """
+        Refresh stale entries for the current hot set, then decay hit scores.
+        Skipped when another scheduler holds the cycle claim.
+        """
+        if not self._claim_cycle():
+            return
+        try:
+            hot = top_dashboards(settings.PRECOMPUTE_TOP_N)
+            QUEUE_DEPTH.labels("precompute").set(len(hot))
+            futures = [self._pool.submit(self._refresh, dashboard_id) for dashboard_id in hot]
+            for future in futures:
+                future.result()
+                QUEUE_DEPTH.labels("precompute").dec()
+            decay_dashboard_hits(settings.PRECOMPUTE_HIT_DECAY)
+        finally:
+            self._end_cycle()
+
+    def _refresh(self, dashboard_id: int):
+        # Imported lazily: the insights router imports this module
+        from app.api.insights import compute_dashboard_insights
+        from app.core.metadata_extractor import fetch_dashboard_metadata
+
+        if self._stop.is_set():
+            return
+        start = time.perf_counter()
+        try:
+            version = metadata_version(fetch_dashboard_metadata(dashboard_id))
+            stored = get_precomputed_insights(dashboard_id)
+            if (
+                stored is not None
+                and stored.get("version") == version
+                and time.time() - stored.get("computed_at", 0) < settings.PRECOMPUTE_REFRESH_SECONDS
+            ):
+                # Still current: an on-demand result becomes a precomputed one (refreshed from now on)
+                if not stored.get("precomputed"):
+                    store_precomputed_insights(
+                        dashboard_id, stored["result"], version, computed_at=stored.get("computed_at"),
+                    )
+                return
+            # Queued behind interactive requests at the generation / execution stages
+            with priority_lane(PRECOMPUTE):
+                result = compute_dashboard_insights(dashboard_id)
+            store_precomputed_insights(dashboard_id, result, result.get("metadata_version", version))
+            logger.info("Precomputed insights for dashboard %s in %.1fs", dashboard_id, time.perf_counter() - start)
+        except Exception as e:
+            logger.warning("Precompute failed for dashboard %s: %s", dashboard_id, getattr(e, "detail", e))
+            return
+
+        # Duty cycle: idle long enough that this worker stays within its CPU fraction
+        fraction = min(max(settings.PRECOMPUTE_CPU_FRACTION, 0.01), 1.0)
+        elapsed = time.perf_counter() - start
+        self._stop.wait(elapsed * (1 - fraction) / fraction)
+
+
+scheduler = PrecomputeScheduler()
+
+
+def main():
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(message)s")
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from app.core.deadline import remaining_budget
 from app.config import settings
 
 
@@ -22,7 +23,8 @@ class SupersetClient:
         """
         url = f"{self.base_url}/api/v1/{endpoint.lstrip('/')}"
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            timeout = remaining_budget(settings.SUPERSET_TIMEOUT_SECONDS, stage="superset_fetch")
+            response = requests.get(url, headers=self.headers, params=params, timeout=timeout)
             response.raise_for_status()
             return response.json()
         except requests.HTTPError as e:
@@ -67,3 +69,34 @@ class SupersetClient:
             "charts": charts,
             "datasets": datasets
         }
+
+    def fetch_chart_sql(self, chart_id: int) -> Optional[str]:
+        """
+        Fetch the SQL Superset generates for a chart's saved query context.
+        """
+        data = self._get(f"chart/{chart_id}/data/", params={"format": "json", "type": "query"})
+        queries = [r.get("query") for r in data.get("result", []) if r.get("query")]
+        return ";\n".join(queries) if queries else None
+
+    def fetch_dataset_columns(self, dataset_id: int) -> List[Dict[str, str]]:
+        """
+        Fetch dataset columns as [{"name": ..., "type": ...}].
+        """
+        result = self._get(f"dataset/{dataset_id}").get("result") or {}
+        return [
+            {"name": col.get("column_name"), "type": col.get("type") or "UNKNOWN"}
+            for col in result.get("columns", [])
+            if col.get("column_name")
+        ]
+
+
+# Default client configured from settings
+client = SupersetClient(settings.SUPERSET_BASE_URL, settings.SUPERSET_API_KEY)
+
+
+def fetch_chart_sql(chart_id: int) -> Optional[str]:
+    return client.fetch_chart_sql(chart_id)
+
+
+def fetch_dataset_columns(dataset_id: int) -> List[Dict[str, str]]:
+    return client.fetch_dataset_columns(dataset_id)
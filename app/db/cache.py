@@ -1,7 +1,12 @@
 import redis
 import pickle
+import logging
 from app.config import settings
 from typing import Any, Optional
+from app.sql.analysis import analyze_sql
+from app.core.metrics import record_cache
+
+logger = logging.getLogger(__name__)
 
 # Initialize Redis client
 redis_client = redis.Redis(
@@ -35,13 +40,23 @@ def get_cached_query_result(query: str) -> Optional[Any]:
     """
     Convenience function for caching SQL query results
     """
-    key = f"sql_cache:{hash(query)}"
-    return get_cache(key)
+    key = f"sql_cache:{analyze_sql(query).fingerprint}"
+    try:
+        result = get_cache(key)
+    except redis.RedisError as e:
+        # A cache outage degrades to a miss instead of failing the caller
+        logger.warning("Query cache unavailable: %s", e)
+        result = None
+    record_cache("query_result", result is not None)
+    return result
 
 
 def set_cached_query_result(query: str, result: Any, expire_seconds: int = 3600):
     """
     Store SQL query results in cache
     """
-    key = f"sql_cache:{hash(query)}"
-    set_cache(key, result, expire_seconds)
+    key = f"sql_cache:{analyze_sql(query).fingerprint}"
+    try:
+        set_cache(key, result, expire_seconds)
+    except redis.RedisError as e:
+        logger.warning("Query cache unavailable: %s", e)
@@ -0,0 +1,104 @@
+"""
+Canonical identity of vector store documents.
+
+Every document describes one Superset object and is stored under
+"{kind}:{object_id}", e.g. "dashboard:12", "chart:40", "chart_sql:40",
+"dataset:7". Charts and datasets are global in Superset (shared between
+dashboards), so their IDs are not scoped by dashboard. The kind and object ID
+are also stored as document metadata for filtering.
+
+`parse_doc_id` also understands the IDs written before this scheme
+(chart-40, chart_40, dashboard_12_chart_40, ...) so the compaction tool
+(app/core/compact_vector_store.py) can migrate existing indexes.
+"""
+import ast
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+DASHBOARD = "dashboard"
+CHART = "chart"
+CHART_SQL = "chart_sql"  # the SQL text of a chart, from the training pack
+DATASET = "dataset"
+KINDS = (DASHBOARD, CHART, CHART_SQL, DATASET)
+
+_CANONICAL_ID = re.compile(r"(dashboard|chart_sql|chart|dataset):(\d+)")
+_LEGACY_IDS = (
+    # build_document_texts
+    (re.compile(r"(dashboard|chart|dataset)-(\d+)"), None),
+    # VectorStore.ingest_dashboard_metadata
+    (re.compile(r"dashboard_\d+_(chart|dataset)_(\d+)"), None),
+    # insights training pack SQL
+    (re.compile(r"chart_(\d+)"), CHART_SQL),
+)
+
+
+def doc_id(kind: str, object_id: Any) -> str:
+    if kind not in KINDS:
+        raise ValueError(f"Unknown document kind: {kind}")
+    return f"{kind}:{int(object_id)}"
+
+
+def parse_doc_id(value: str) -> Optional[Tuple[str, int]]:
+    """
+    (kind, object_id) for a canonical or legacy document ID, None if unrecognized.
+    """
+    match = _CANONICAL_ID.fullmatch(value)
+    if match:
+        return match.group(1), int(match.group(2))
+    for pattern, kind in _LEGACY_IDS:
+        match = pattern.fullmatch(value)
+        if match:
+            if kind is None:
+                return match.group(1), int(match.group(2))
+            return kind, int(match.group(1))
+    return None
+
+
+def canonical_doc_id(value: str) -> Optional[str]:
+    parsed = parse_doc_id(value)
+    return doc_id(*parsed) if parsed else None
+
+
+def dedupe_documents(documents: List[Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """
+    One document per canonical ID ({canonical id: document}); a document already stored
+    under its canonical ID wins over legacy copies, otherwise the first one seen is kept.
+    Unrecognized IDs are kept as they are. Returns the kept documents and the number of unrecognized IDs.
+    """
+    kept: Dict[str, Dict[str, Any]] = {}
+    unrecognized = 0
+    for doc in documents:
+        canonical = canonical_doc_id(doc["id"])
+        if canonical is None:
+            unrecognized += 1
+            canonical = doc["id"]
+        existing = kept.get(canonical)
+        if existing is None or (doc["id"] == canonical and existing["id"] != canonical):
+            kept[canonical] = doc
+    return kept, unrecognized
+
+
+def doc_kind(value: str) -> Optional[str]:
+    parsed = parse_doc_id(value)
+    return parsed[0] if parsed else None
+
+
+def doc_metadata(value: str) -> Dict[str, Any]:
+    """
+    Chroma metadata for a document ID.
+    """
+    parsed = parse_doc_id(value)
+    if parsed is None:
+        return {"kind": "unknown"}
+    return {"kind": parsed[0], "object_id": parsed[1]}
+
+
+def load_document(text: str) -> Any:
+    """
+    Parse a chart / dataset document body: JSON, or the Python repr older ingests wrote.
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        return ast.literal_eval(text)
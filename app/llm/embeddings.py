@@ -1,29 +1,73 @@
-from transformers import AutoTokenizer, AutoModel
-import torch
-import numpy as np
+from functools import lru_cache
+from app.config import settings
 
 # Load model (can be replaced with Mistral / Llama embeddings model)
-MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+MODEL_NAME = settings.EMBEDDING_MODEL_NAME
 
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModel.from_pretrained(MODEL_NAME)
+
+@lru_cache(maxsize=1)
+def load_embedding_model():
+    """
+    Load tokenizer + model once per process. Workers that use the shared
+    model server (MODEL_SERVER_SOCKET) never call this, so they skip torch.
+    """
+    from transformers import AutoTokenizer, AutoModel
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    model = AutoModel.from_pretrained(MODEL_NAME)
+    model.eval()
+    return tokenizer, model
 
 
 def mean_pooling(model_output, attention_mask):
     """
     Perform mean pooling on token embeddings
     """
+    import torch
+
     token_embeddings = model_output[0]  # First element of output tuple
     input_mask_expanded = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
     return torch.sum(token_embeddings * input_mask_expanded, 1) / torch.clamp(input_mask_expanded.sum(1), min=1e-9)
 
 
+def embed_local(texts: list[str], batch_size: int = 32) -> list[list[float]]:
+    """
+    Embed texts with the in-process model, batching forward passes
+    """
+    import torch
+
+    tokenizer, model = load_embedding_model()
+    embeddings: list[list[float]] = []
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        encoded_input = tokenizer(batch, padding=True, truncation=True, return_tensors="pt")
+        with torch.no_grad():
+            model_output = model(**encoded_input)
+        pooled = mean_pooling(model_output, encoded_input["attention_mask"])
+        embeddings.extend(pooled.cpu().numpy().tolist())
+    return embeddings
+
+
 def get_embedding(text: str) -> list[float]:
     """
     Generate embedding vector for a given text
     """
-    encoded_input = tokenizer(text, padding=True, truncation=True, return_tensors="pt")
-    with torch.no_grad():
-        model_output = model(**encoded_input)
-    embedding = mean_pooling(model_output, encoded_input["attention_mask"])
-    return embedding.squeeze().cpu().numpy().tolist()
+    return get_embeddings([text])[0]
+
+
+def get_embeddings(texts: list[str], batch_size: int = 32) -> list[list[float]]:
+    """
+    Generate embedding vectors for many texts, via the shared model server
+    when MODEL_SERVER_SOCKET is set, otherwise in-process
+    """
+    if not texts:
+        return []
+    if settings.MODEL_SERVER_SOCKET:
+        from app.llm.model_client import get_model_client
+        return get_model_client().embed(texts)
+    return embed_local(texts, batch_size=batch_size)
+
+
+if not settings.MODEL_SERVER_SOCKET:
+    # Keep the previous behaviour: load eagerly so the first request doesn't pay for it
+    load_embedding_model()
@@ -0,0 +1,172 @@
+"""
+Local text generation with HuggingFace transformers.
+Used in-process by RAGAgent, or by the shared model server (app/llm/model_server.py).
+
+Optionally, a small draft model from the same tokenizer family speeds up
+greedy decoding (HF assisted generation): the draft proposes a few tokens
+and the main model verifies them in one forward pass. Greedy output is
+identical to decoding with the main model alone.
+"""
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from transformers import AutoTokenizer, AutoModelForCausalLM, StoppingCriteria, StoppingCriteriaList, pipeline
+import torch
+
+
+class GenerationTimer(StoppingCriteria):
+    """
+    Observes decoding steps to split latency into prefill (prompt forward pass
+    up to the first token) and decode, and to count prompt / generated tokens.
+    Stops generation only when `should_stop()` returns True (request cancelled).
+    """
+
+    def __init__(self, should_stop: Optional[Callable[[], bool]] = None, prompt_tokens: Optional[int] = None):
+        self.should_stop = should_stop
+        self.start = time.perf_counter()
+        self.first_token_at = None
+        # Assisted generation can add several tokens per step, so the caller passes the prompt length
+        self.known_prompt_tokens = prompt_tokens
+        self.prompt_tokens = 0
+        self.total_tokens = 0
+        self.rows = 1
+        self.steps = 0  # main-model forward passes after prefill
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            if self.known_prompt_tokens is None:
+                self.prompt_tokens = input_ids.shape[-1] - 1
+            else:
+                self.prompt_tokens = self.known_prompt_tokens
+            self.rows = input_ids.shape[0]
+        self.steps += 1
+        self.total_tokens = input_ids.shape[-1]
+        return bool(self.should_stop and self.should_stop())
+
+    def stats(self) -> Dict[str, float]:
+        end = time.perf_counter()
+        first = self.first_token_at or end
+        return {
+            "prefill_seconds": first - self.start,
+            "decode_seconds": end - first,
+            "prompt_tokens": self.prompt_tokens * self.rows,
+            "generated_tokens": max(self.total_tokens - self.prompt_tokens, 0) * self.rows,
+            "forward_passes": self.steps,
+        }
+
+
+class RowDeadlines(StoppingCriteria):
+    """
+    Stops each row of a batch at its own deadline (a time.monotonic() value, None = no deadline),
+    so one request's budget does not cut the other rows short. Needs a transformers
+    version that accepts per-row stopping criteria results.
+    """
+
+    def __init__(self, expires_at: List[Optional[float]]):
+        self.expires_at = expires_at
+
+    def __call__(self, input_ids, scores, **kwargs):
+        now = time.monotonic()
+        done = [expires_at is not None and now >= expires_at for expires_at in self.expires_at]
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+
+def merge_stats(stats: List[Dict[str, float]]) -> Dict[str, float]:
+    merged: Dict[str, float] = {}
+    for item in stats:
+        for key, value in item.items():
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def per_row_stats(stats: Dict[str, float], rows: int) -> Dict[str, float]:
+    """
+    One prompt's share of the stats of a batched call: token counts are split evenly,
+    latencies are what every prompt in the batch waited.
+    """
+    rows = max(rows, 1)
+    return {
+        **stats,
+        "prompt_tokens": stats["prompt_tokens"] / rows,
+        "generated_tokens": stats["generated_tokens"] / rows,
+    }
+
+
+def load_generator(model_name: str):
+    """
+    Build the HuggingFace text-generation pipeline for a causal LM.
+    """
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(model_name)
+    model.eval()
+    # Left padding + a pad token let the model server batch prompts
+    tokenizer.padding_side = "left"
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    return pipeline(
+        "text-generation",
+        model=model,
+        tokenizer=tokenizer,
+        device=0 if torch.cuda.is_available() else -1
+    )
+
+
+def load_draft_model(model_name: str, generator, num_tokens: int = 5, schedule: str = "heuristic"):
+    """
+    Load a draft model for assisted generation with `generator` (from load_generator).
+    It must share the main model's vocabulary.
+    num_tokens: tokens proposed per step; schedule "heuristic" adapts it to the acceptance rate.
+    """
+    draft_tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if draft_tokenizer.get_vocab() != generator.tokenizer.get_vocab():
+        raise ValueError(f"Draft model {model_name} does not share the main model's tokenizer")
+    model = AutoModelForCausalLM.from_pretrained(model_name).to(generator.model.device)
+    model.eval()
+    model.generation_config.num_assistant_tokens = num_tokens
+    model.generation_config.num_assistant_tokens_schedule = schedule
+    return model
+
+
+def _generate_assisted(generator, prompts: List[str], assistant_model, should_stop,
+                       row_deadlines: List[Optional[float]], **kwargs: Any):
+    # Assisted generation verifies one sequence at a time
+    texts, stats = [], []
+    for prompt, expires_at in zip(prompts, row_deadlines):
+        prompt_kwargs = dict(kwargs)
+        if expires_at is not None:
+            prompt_kwargs["max_time"] = max(expires_at - time.monotonic(), 0.0)
+        timer = GenerationTimer(should_stop, prompt_tokens=len(generator.tokenizer(prompt)["input_ids"]))
+        output = generator(
+            prompt, assistant_model=assistant_model, stopping_criteria=StoppingCriteriaList([timer]), **prompt_kwargs
+        )
+        texts.append(output[0]["generated_text"])
+        stats.append(timer.stats())
+    return texts, merge_stats(stats)
+
+
+def generate_texts(generator, prompts: List[str], should_stop: Optional[Callable[[], bool]] = None,
+                   assistant_model=None, row_deadlines: Optional[List[Optional[float]]] = None,
+                   **kwargs: Any) -> Tuple[List[str], Dict[str, float]]:
+    """
+    Generate completions for one or more prompts in a single pipeline call.
+    Returns the generated texts and timing / token stats for the call.
+    Pass `max_time` (seconds) and/or `should_stop` to cut decoding short for the whole call,
+    or `row_deadlines` (one time.monotonic() deadline or None per prompt) to stop each prompt at its own.
+    With `assistant_model` (see load_draft_model), greedy requests use assisted generation;
+    sampled requests ignore it.
+    """
+    if assistant_model is not None and not kwargs.get("do_sample"):
+        return _generate_assisted(
+            generator, prompts, assistant_model, should_stop, row_deadlines or [None] * len(prompts), **kwargs
+        )
+
+    timer = GenerationTimer(should_stop)
+    criteria = [timer]
+    if row_deadlines and any(expires_at is not None for expires_at in row_deadlines):
+        criteria.append(RowDeadlines(row_deadlines))
+    outputs = generator(
+        prompts, batch_size=len(prompts), stopping_criteria=StoppingCriteriaList(criteria), **kwargs
+    )
+    # A list input yields one list of candidates per prompt
+    texts = [output[0]["generated_text"] for output in outputs]
+    return texts, timer.stats()
@@ -1,33 +1,53 @@
 from typing import Dict, Tuple
 from app.llm.vector_store import VectorStore
-from app.llm.embeddings import get_embedding
+from app.llm.prompts import build_insight_prompt
+from app.core.metrics import stage, record_generation
+from app.core.deadline import current_deadline, check_deadline
 from app.config import settings
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
-import torch
 
 class RAGAgent:
     """
     Retriever-Augmented Generation agent.
     Combines Vector Store retrieval with local LLM to generate SQL + insights.
+    With MODEL_SERVER_SOCKET set, generation runs in the shared model server
+    instead of loading the LLM into this process.
     """
 
     def __init__(self, vector_store: VectorStore):
         self.vector_store = vector_store
         self.model_name = settings.LLM_MODEL_NAME
-        self.tokenizer, self.model = self._load_llm()
-        # HuggingFace pipeline for text generation
-        self.generator = pipeline(
-            "text-generation",
-            model=self.model,
-            tokenizer=self.tokenizer,
-            device=0 if torch.cuda.is_available() else -1
-        )
+        self.generator = None
+        self.draft_model = None
+        if not settings.MODEL_SERVER_SOCKET:
+            from app.llm.generation import load_generator, load_draft_model
+            # HuggingFace pipeline for text generation
+            self.generator = load_generator(self.model_name)
+            if settings.LLM_DRAFT_MODEL_NAME:
+                self.draft_model = load_draft_model(
+                    settings.LLM_DRAFT_MODEL_NAME, self.generator,
+                    num_tokens=settings.LLM_DRAFT_NUM_TOKENS, schedule=settings.LLM_DRAFT_SCHEDULE,
+                )
 
-    def _load_llm(self):
-        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        model = AutoModelForCausalLM.from_pretrained(self.model_name)
-        model.eval()
-        return tokenizer, model
+    def _generate(self, prompt: str, **kwargs) -> str:
+        deadline = current_deadline()
+        if deadline is not None:
+            # Decoding stops when the request budget runs out (max_time) or the client goes away
+            deadline.check("generation")
+            kwargs["max_time"] = deadline.remaining()
+        if self.generator is None:
+            from app.llm.model_client import get_model_client
+            text, stats = get_model_client().generate(prompt, **kwargs)
+        else:
+            from app.llm.generation import generate_texts
+            should_stop = None if deadline is None else (lambda: deadline.cancelled)
+            texts, stats = generate_texts(
+                self.generator, [prompt], should_stop=should_stop, assistant_model=self.draft_model, **kwargs
+            )
+            text = texts[0]
+        record_generation(stats)
+        # A completion cut short by the deadline is not worth parsing
+        check_deadline("generation")
+        return text
 
     def generate_insight(self, dashboard_metadata: Dict) -> Tuple[str, str]:
         """
@@ -43,30 +63,15 @@ class RAGAgent:
 
         # --- Step 1: Retrieve relevant docs
         query_text = f"Generate SQL and insight for dashboard {dashboard_id}"
-        top_docs = self.vector_store.query(query_text, top_k=5)
+        with stage("retrieval"):
+            top_docs = self.vector_store.query(query_text, top_k=5)
         context_text = "\n".join([doc["text"] for doc in top_docs])
 
         # --- Step 2: Construct prompt
-        prompt = f"""
-        You are a SQL expert and data analyst.
-        Based on the following dashboard metadata, generate:
-        1. A single SQL query that could answer key metrics.
-        2. A brief natural-language insight.
-        Only produce syntactically correct SQL and a short insight.
-
-        Context:
-        {context_text}
-
-        Response format:
-        SQL:
-        <your SQL here>
-
-        Insight:
-        <short insight here>
-        """
+        prompt = build_insight_prompt(context_text)
 
         # --- Step 3: Generate using LLM
-        response = self.generator(prompt, max_length=1024, do_sample=False)[0]["generated_text"]
+        response = self._generate(prompt, max_length=1024, do_sample=False)
 
         # --- Step 4: Parse response
         sql = ""
@@ -0,0 +1,88 @@
+"""
+Client for the shared model server (app/llm/model_server.py).
+API workers use it instead of loading the embedding model and LLM themselves.
+"""
+import threading
+from functools import lru_cache
+from multiprocessing.connection import Client, Connection
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+
+
+class ModelServerError(RuntimeError):
+    """
+    Raised when the model server is unreachable or reports a failure.
+    """
+
+
+class ModelClient:
+    """
+    Thread-safe client; each thread keeps its own connection to the server socket.
+    """
+
+    def __init__(self, socket_path: str, authkey: bytes, timeout: float = 300.0):
+        self.socket_path = socket_path
+        self.authkey = authkey
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or conn.closed:
+            try:
+                conn = Client(self.socket_path, family="AF_UNIX", authkey=self.authkey)
+            except OSError as e:
+                raise ModelServerError(f"Model server unavailable at {self.socket_path}: {e}") from e
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def _call(self, request: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        # One retry covers a server restart between requests
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.send(request)
+                if not conn.poll(self.timeout if timeout is None else timeout):
+                    self._drop_connection()
+                    raise ModelServerError(f"Model server timed out on {request['op']}")
+                response = conn.recv()
+                break
+            except (EOFError, OSError) as e:
+                self._drop_connection()
+                if attempt:
+                    raise ModelServerError(f"Model server connection lost: {e}") from e
+        if not response.get("ok"):
+            raise ModelServerError(response.get("error", "unknown model server error"))
+        return response["result"]
+
+    def ping(self) -> Dict[str, Any]:
+        return self._call({"op": "ping"}, timeout=5)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self._call({"op": "embed", "texts": list(texts)})
+
+    def generate(self, prompt: str, **kwargs: Any) -> Tuple[str, Dict[str, float]]:
+        """
+        Returns the generated text and timing / token stats (see app.llm.generation).
+        With `max_time` set, the server stops decoding after that many seconds.
+        """
+        max_time = kwargs.get("max_time")
+        # Allow for queueing in the server's batcher on top of the decode budget
+        timeout = None if max_time is None else min(self.timeout, max_time + 5.0)
+        result = self._call({"op": "generate", "prompt": prompt, "kwargs": kwargs}, timeout=timeout)
+        return result["text"], result["stats"]
+
+
+@lru_cache(maxsize=1)
+def get_model_client() -> ModelClient:
+    return ModelClient(
+        settings.MODEL_SERVER_SOCKET,
+        authkey=settings.MODEL_SERVER_AUTHKEY.encode("utf-8"),
+        timeout=settings.MODEL_SERVER_TIMEOUT,
+    )
@@ -0,0 +1,192 @@
+"""
+Shared model-serving process.
+
+Owns one copy of the embedding model and the LLM per node and serves API
+workers over a Unix domain socket (multiprocessing.connection, HMAC-authenticated
+with MODEL_SERVER_AUTHKEY). Concurrent requests are batched server side:
+embedding texts from many workers go through one forward pass, and generation
+prompts with identical parameters share one pipeline call.
+
+    export MODEL_SERVER_AUTHKEY=$(openssl rand -hex 32)
+    MODEL_SERVER_SOCKET=/run/openpulse/models.sock python -m app.llm.model_server
+    MODEL_SERVER_SOCKET=/run/openpulse/models.sock uvicorn app.main:app --workers 8
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Listener, Connection
+from typing import Any, Callable, List, Optional, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Batcher:
+    """
+    Collects submitted items for up to `max_wait` seconds (or until `max_batch`
+    items are pending) and processes them with a single `fn(items)` call.
+    `fn` must return one result per item, in order.
+    """
+
+    def __init__(self, name: str, fn: Callable[[List[Any]], List[Any]], max_batch: int, max_wait: float):
+        self.fn = fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[Tuple[List[Any], Future]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, items: List[Any]) -> Future:
+        future: Future = Future()
+        self._queue.put((items, future))
+        return future
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            count = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while count < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items, future = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append((items, future))
+                count += len(items)
+
+            flat = [item for items, _ in pending for item in items]
+            try:
+                results = self.fn(flat)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for items, future in pending:
+                future.set_result(results[offset:offset + len(items)])
+                offset += len(items)
+
+
+class ModelServer:
+    def __init__(self):
+        from app.llm.embeddings import embed_local, load_embedding_model
+        from app.llm.generation import load_generator, load_draft_model
+
+        load_embedding_model()
+        self._embed_local = embed_local
+        self.generator = load_generator(settings.LLM_MODEL_NAME)
+        self.draft_model = None
+        if settings.LLM_DRAFT_MODEL_NAME:
+            self.draft_model = load_draft_model(
+                settings.LLM_DRAFT_MODEL_NAME, self.generator,
+                num_tokens=settings.LLM_DRAFT_NUM_TOKENS, schedule=settings.LLM_DRAFT_SCHEDULE,
+            )
+
+        wait = settings.MODEL_SERVER_BATCH_WAIT_MS / 1000.0
+        self.embed_batcher = Batcher("embed", self._embed_batch, settings.MODEL_SERVER_EMBED_BATCH, wait)
+        self.generate_batcher = Batcher("generate", self._generate_batch, settings.MODEL_SERVER_GENERATE_BATCH, wait)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self._embed_local(texts, batch_size=settings.MODEL_SERVER_EMBED_BATCH)
+
+    def _generate_batch(self, requests: List[Tuple[str, str, Optional[float]]]) -> List[dict]:
+        """
+        requests: (prompt, kwargs as JSON, deadline); prompts with equal kwargs are
+        generated together, each row stopping at its own deadline (time.monotonic()).
+        """
+        from app.llm.generation import generate_texts, per_row_stats
+
+        results: List[Any] = [None] * len(requests)
+        groups: dict = {}
+        for idx, (prompt, kwargs_key, _) in enumerate(requests):
+            groups.setdefault(kwargs_key, []).append(idx)
+        for kwargs_key, indexes in groups.items():
+            kwargs = json.loads(kwargs_key)
+            texts, stats = generate_texts(
+                self.generator, [requests[i][0] for i in indexes], assistant_model=self.draft_model,
+                row_deadlines=[requests[i][2] for i in indexes], **kwargs
+            )
+            # Each requester records its own share of the batch's token counts
+            row_stats = per_row_stats(stats, len(indexes))
+            for i, text in zip(indexes, texts):
+                results[i] = {"text": text, "stats": row_stats}
+        return results
+
+    def handle(self, request: dict) -> Any:
+        op = request.get("op")
+        if op == "ping":
+            return {
+                "pid": os.getpid(),
+                "llm": settings.LLM_MODEL_NAME,
+                "draft": settings.LLM_DRAFT_MODEL_NAME if self.draft_model is not None else None,
+                "embedding": settings.EMBEDDING_MODEL_NAME,
+            }
+        if op == "embed":
+            return self.embed_batcher.submit(request["texts"]).result()
+        if op == "generate":
+            kwargs = dict(request.get("kwargs", {}))
+            # Per-request budgets differ; keep them out of the batching key.
+            # The budget starts now, so time queued in the batcher counts against it.
+            max_time = kwargs.pop("max_time", None)
+            expires_at = None if max_time is None else time.monotonic() + max_time
+            kwargs_key = json.dumps(kwargs, sort_keys=True)
+            return self.generate_batcher.submit([(request["prompt"], kwargs_key, expires_at)]).result()[0]
+        raise ValueError(f"Unknown op: {op}")
+
+    def serve_connection(self, conn: Connection):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    response = {"ok": True, "result": self.handle(request)}
+                except Exception as e:
+                    logger.exception("Model server request failed")
+                    response = {"ok": False, "error": str(e)}
+                try:
+                    conn.send(response)
+                except OSError:
+                    return
+
+    def serve_forever(self, socket_path: str):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), mode=0o700, exist_ok=True)
+        # Create the socket owner-only from the start (no window between bind and chmod)
+        previous_umask = os.umask(0o177)
+        try:
+            listener = Listener(socket_path, family="AF_UNIX", authkey=settings.MODEL_SERVER_AUTHKEY.encode("utf-8"))
+        finally:
+            os.umask(previous_umask)
+        logger.info("Model server listening on %s", socket_path)
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    # Includes failed authentication from a stray client
+                    logger.warning("Rejected model server connection: %s", e)
+                    continue
+                threading.Thread(target=self.serve_connection, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+
+
+def main():
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(message)s")
+    if not settings.MODEL_SERVER_SOCKET:
+        raise SystemExit("MODEL_SERVER_SOCKET must be set")
+    ModelServer().serve_forever(settings.MODEL_SERVER_SOCKET)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,27 @@
 """
-Predefined prompt templates for LLM-based RAG agent.
-These templates are used to generate SQL + insights
-based on retrieved dashboard metadata.
+Prompt templates for the local LLM.
+Kept free of heavy imports so benchmarks can build the same prompts.
 """
 
-SQL_INSIGHT_PROMPT = """
-You are a SQL expert and data analyst.
-Based on the following dashboard metadata, generate:
-1. A single SQL query that could answer key metrics.
-2. A brief natural-language insight.
-Only produce syntactically correct SQL and a short insight.
 
-Context:
-{context_text}
+def build_insight_prompt(context_text: str) -> str:
+    """
+    SQL + insight prompt for the retrieved dashboard context.
+    """
+    return f"""
+        You are a SQL expert and data analyst.
+        Based on the following dashboard metadata, generate:
+        1. A single SQL query that could answer key metrics.
+        2. A brief natural-language insight.
+        Only produce syntactically correct SQL and a short insight.
 
-Response format:
-SQL:
-<your SQL here>
+        Context:
+        {context_text}
 
-Insight:
-<short insight here>
-"""
+        Response format:
+        SQL:
+        <your SQL here>
+
+        Insight:
+        <short insight here>
+        """
@@ -1,8 +1,10 @@
 import os
-from typing import List, Dict, Any
+import json
+from typing import List, Dict, Any, Iterator, Optional
 from chromadb import Client
 from chromadb.config import Settings
 from app.llm.embeddings import get_embedding  # We'll implement this separately
+from app.llm.documents import CHART, DATASET, doc_id, doc_metadata
 
 class VectorStore:
     """
@@ -30,7 +32,6 @@ class VectorStore:
         Each chart/dataset is treated as a separate document.
         """
         documents = []
-        ids = []
 
         dashboard_id = metadata.get("dashboard", {}).get("id")
         if not dashboard_id:
@@ -38,44 +39,122 @@ class VectorStore:
 
         # Process charts
         for chart in metadata.get("charts", []):
-            doc_text = str(chart)
-            doc_id = f"dashboard_{dashboard_id}_chart_{chart.get('id')}"
-            embedding = get_embedding(doc_text)
+            doc_text = json.dumps(chart, default=str)
             documents.append({
-                "id": doc_id,
+                "id": doc_id(CHART, chart.get("id")),
                 "text": doc_text,
-                "embedding": embedding
+                "embedding": get_embedding(doc_text)
             })
-            ids.append(doc_id)
 
         # Process datasets
         for dataset in metadata.get("datasets", []):
-            doc_text = str(dataset)
-            doc_id = f"dashboard_{dashboard_id}_dataset_{dataset.get('id')}"
-            embedding = get_embedding(doc_text)
+            doc_text = json.dumps(dataset, default=str)
             documents.append({
-                "id": doc_id,
+                "id": doc_id(DATASET, dataset.get("id")),
                 "text": doc_text,
-                "embedding": embedding
+                "embedding": get_embedding(doc_text)
             })
-            ids.append(doc_id)
 
-        # Add to collection
-        self.collection.add(
+        # Charts and datasets shared with other dashboards are replaced, not duplicated
+        self.add_documents(
             ids=[d["id"] for d in documents],
-            documents=[d["text"] for d in documents],
+            texts=[d["text"] for d in documents],
             embeddings=[d["embedding"] for d in documents]
         )
 
+    def add_documents(self, ids: List[str], texts: List[str], embeddings: List[List[float]]):
+        """
+        Insert or replace a batch of documents with precomputed embeddings.
+        IDs should come from app.llm.documents.doc_id.
+        """
+        if not ids:
+            return
+        self.collection.upsert(
+            ids=ids,
+            documents=texts,
+            embeddings=embeddings,
+            metadatas=[doc_metadata(i) for i in ids]
+        )
+
+    def add_document(self, doc_id: str, text: str, embedding: List[float]):
+        """
+        Insert or replace a single document with a precomputed embedding.
+        """
+        self.add_documents(ids=[doc_id], texts=[text], embeddings=[embedding])
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def iter_documents(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every stored document as {"id", "text", "embedding", "metadata"}.
+        """
+        offset = 0
+        while True:
+            batch = self.collection.get(
+                include=["documents", "embeddings", "metadatas"],
+                limit=batch_size,
+                offset=offset
+            )
+            ids = batch["ids"]
+            if not ids:
+                return
+            metadatas = batch.get("metadatas") or [None] * len(ids)
+            for idx, stored_id in enumerate(ids):
+                yield {
+                    "id": stored_id,
+                    "text": batch["documents"][idx],
+                    "embedding": list(batch["embeddings"][idx]),
+                    "metadata": metadatas[idx],
+                }
+            offset += len(ids)
+
+    def rebuild(self, documents: List[Dict[str, Any]], batch_size: int = 1000):
+        """
+        Replace the whole collection with `documents` ({"id", "text", "embedding"}),
+        building a fresh index instead of leaving deleted entries in the old one.
+        """
+        staging_name = f"{self.collection_name}__rebuild"
+        try:
+            self.client.delete_collection(staging_name)
+        except Exception:
+            pass
+        staging = self.client.create_collection(staging_name)
+        for start in range(0, len(documents), batch_size):
+            batch = documents[start:start + batch_size]
+            staging.add(
+                ids=[d["id"] for d in batch],
+                documents=[d["text"] for d in batch],
+                embeddings=[d["embedding"] for d in batch],
+                metadatas=[doc_metadata(d["id"]) for d in batch]
+            )
+        # Move the live collection aside before the swap and drop it only afterwards:
+        # a crash in between leaves it under `{name}__previous` instead of losing it
+        previous_name = f"{self.collection_name}__previous"
+        try:
+            self.client.delete_collection(previous_name)
+        except Exception:
+            pass
+        self.client.get_collection(self.collection_name).modify(name=previous_name)
+        staging.modify(name=self.collection_name)
+        self.collection = self.client.get_collection(self.collection_name)
+        self.client.delete_collection(previous_name)
+        self.persist()
+
+    def query_embedding(self, embedding: List[float], top_k: int = 5) -> Dict[str, Any]:
+        return self.collection.query(query_embeddings=[embedding], n_results=top_k)
+
+    def persist(self):
+        """
+        Flush the collection to disk (duckdb+parquet backend).
+        """
+        self.client.persist()
+
     def query(self, query_text: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """
         Retrieve top-k relevant metadata entries for a query.
         """
-        embedding = get_embedding(query_text)
-        results = self.collection.query(
-            query_embeddings=[embedding],
-            n_results=top_k
-        )
+        results = self.query_embedding(get_embedding(query_text), top_k=top_k)
         hits = []
         for idx, doc_id in enumerate(results['ids'][0]):
             hits.append({
@@ -1,58 +1,115 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from app.models.insights import InsightsRequest, InsightsResponse, SQLResultRow
-from app.llm.vector_store import VectorStore
-from app.llm.langchain_agent import RAGAgent
+from app.llm.documents import CHART, DATASET, doc_kind, load_document
 from app.sql.validator import validate_sql
 from app.sql.executor import execute_sql
+from app.sql.dry_run import dry_run_sql, dry_run_to_http
+from app.core.schema_analyzer import analyze_schema
+from app.core.precompute import metadata_version, scheduler as precompute_scheduler
+from app.api.metrics import router as metrics_router
+# Vector Store and RAG Agent are shared with the insights router (one model per process)
+from app.api.insights import router as insights_router, vector_store, rag_agent
+from app.core.metrics import stage, IN_FLIGHT
+from app.core.admission import (
+    AdmissionRejected,
+    rejection_to_http,
+    endpoint_controller,
+    generation_admission,
+    execution_admission,
+)
+from app.core.deadline import run_with_deadline, check_deadline, remaining_budget
 from app.config import settings
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.PRECOMPUTE_ENABLED:
+        precompute_scheduler.start()
+    try:
+        yield
+    finally:
+        precompute_scheduler.stop()
+
+
 # Initialize FastAPI
 app = FastAPI(
     title="Superset Insights Service",
     description="Generates SQL and natural-language insights for Superset dashboards",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-# Initialize Vector Store and RAG Agent
-vector_store = VectorStore(persist_path=settings.VECTOR_STORE_PATH)
-rag_agent = RAGAgent(vector_store=vector_store)
+app.include_router(metrics_router)
+app.include_router(insights_router)
+
+insights_admission = endpoint_controller("insights")
 
 
 @app.post("/insights", response_model=InsightsResponse)
-def generate_insights(request: InsightsRequest):
+async def generate_insights(request: InsightsRequest, http_request: Request):
     """
     Generate SQL and insight for a given Superset dashboard ID.
     """
+    return await run_with_deadline(http_request, _admit_insights, request)
+
+
+def _admit_insights(request: InsightsRequest) -> InsightsResponse:
+    try:
+        with insights_admission.admit(), IN_FLIGHT.labels("insights").track_inprogress():
+            return _generate_insights(request)
+    except AdmissionRejected as e:
+        raise rejection_to_http(e)
+
+
+def _generate_insights(request: InsightsRequest) -> InsightsResponse:
     dashboard_id = request.dashboard_id
 
     # Step 1: Retrieve dashboard metadata from vector store
     # (Assumes metadata already ingested)
-    top_docs = vector_store.query(f"Dashboard ID: {dashboard_id}", top_k=5)
+    with stage("retrieval"):
+        top_docs = vector_store.query(f"Dashboard ID: {dashboard_id}", top_k=5)
     if not top_docs:
         raise HTTPException(status_code=404, detail=f"No metadata found for dashboard {dashboard_id}")
 
     dashboard_metadata = {
         "dashboard": {"id": dashboard_id},
-        "charts": [eval(doc["text"]) for doc in top_docs if "chart" in doc["id"]],
-        "datasets": [eval(doc["text"]) for doc in top_docs if "dataset" in doc["id"]]
+        "charts": [load_document(doc["text"]) for doc in top_docs if doc_kind(doc["id"]) == CHART],
+        "datasets": [load_document(doc["text"]) for doc in top_docs if doc_kind(doc["id"]) == DATASET]
     }
 
     # Step 2: Generate SQL + insight via RAG agent
     try:
-        sql, insight = rag_agent.generate_insight(dashboard_metadata)
+        with generation_admission.admit(max_wait=remaining_budget(settings.ADMISSION_MAX_WAIT_SECONDS)):
+            sql, insight = rag_agent.generate_insight(dashboard_metadata)
+    except AdmissionRejected as e:
+        raise rejection_to_http(e)
     except Exception as e:
+        check_deadline("generation")
         raise HTTPException(status_code=500, detail=f"LLM generation error: {str(e)}")
 
     # Step 3: Validate SQL
-    is_valid, message = validate_sql(sql)
+    with stage("sql_validation"):
+        is_valid, message = validate_sql(sql)
     if not is_valid:
         raise HTTPException(status_code=400, detail=f"SQL validation failed: {message}")
 
-    # Step 4: Execute SQL in Postgres
+    # Step 4: Dry run against the local schema replica. Retrieval returns only some of the
+    # dashboard's datasets, so a table missing from the replica is not conclusive here.
+    schema_columns = analyze_schema([d for d in dashboard_metadata["datasets"] if isinstance(d, dict)]).columns
+    dry_run = dry_run_sql(sql, dashboard_id, metadata_version(dashboard_metadata), schema_columns, complete=False)
+    if not dry_run.ok:
+        raise dry_run_to_http(sql, dry_run)
+
+    # Step 5: Execute SQL in Postgres
     try:
-        results_raw = execute_sql(sql)
+        with execution_admission.admit(max_wait=remaining_budget(settings.ADMISSION_MAX_WAIT_SECONDS)):
+            results_raw = execute_sql(sql)
         results = [SQLResultRow(data=row) for row in results_raw]
+    except AdmissionRejected as e:
+        raise rejection_to_http(e)
     except Exception as e:
+        check_deadline("sql_execution")
         raise HTTPException(status_code=500, detail=f"SQL execution error: {str(e)}")
 
     return InsightsResponse(
@@ -0,0 +1,228 @@
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+import sqlparse
+from sqlparse.sql import IdentifierList, Identifier, Parenthesis, TokenList
+from sqlparse.tokens import Keyword, DML, DDL, CTE, Comment, Whitespace, Number, Punctuation
+
+# sqlparse exports no DCL alias (GRANT / REVOKE)
+DCL = Keyword.DCL
+
+# Upper bound on distinct query texts kept in the analysis cache
+ANALYSIS_CACHE_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class SQLAnalysis:
+    """
+    Immutable result of parsing a SQL query once.
+    - statement_type: sqlparse type of the first statement (SELECT, INSERT, ...)
+    - commands: leading keyword of every statement (WITH, SELECT, DROP, ...)
+    - tables: physical tables referenced in FROM / JOIN clauses
+    - ctes: names defined in WITH clauses (excluded from tables)
+    - verbs: every DML / DDL / DCL keyword, including those nested in CTEs and subqueries
+    - has_into: an INTO clause appears anywhere (INSERT INTO, SELECT ... INTO)
+    - has_limit / limit: top-level LIMIT (or FETCH FIRST n ROWS ONLY) clause of the first statement
+    - fingerprint: hash of the normalized query text
+    """
+    statement_type: str
+    commands: Tuple[str, ...]
+    tables: Tuple[str, ...]
+    ctes: Tuple[str, ...]
+    verbs: Tuple[str, ...]
+    has_into: bool
+    has_limit: bool
+    limit: Optional[int]
+    normalized: str
+    fingerprint: str
+
+    @property
+    def statement_count(self) -> int:
+        return len(self.commands)
+
+
+def _is_table_keyword(token) -> bool:
+    if token.ttype is not Keyword:
+        return False
+    value = token.normalized
+    return value == "FROM" or value.endswith("JOIN")
+
+
+def _identifier_name(identifier: Identifier) -> Optional[str]:
+    name = identifier.get_real_name()
+    if not name:
+        return None
+    parent = identifier.get_parent_name()
+    return f"{parent}.{name}" if parent else name
+
+
+def _collect_tables(token_list: TokenList, tables: list, ctes: list):
+    """
+    Walk grouped tokens recursively, collecting table names that follow
+    FROM / JOIN keywords and CTE names that follow WITH.
+    """
+    expect = None  # "table" after FROM/JOIN, "cte" after WITH
+    for token in token_list.tokens:
+        if token.is_whitespace or token.ttype in Comment:
+            continue
+
+        if token.ttype is CTE:
+            expect = "cte"
+            continue
+        if _is_table_keyword(token):
+            expect = "table"
+            continue
+
+        if expect and isinstance(token, (Identifier, IdentifierList)):
+            identifiers = token.get_identifiers() if isinstance(token, IdentifierList) else [token]
+            for identifier in identifiers:
+                if not isinstance(identifier, Identifier):
+                    continue
+                subquery = next((t for t in identifier.tokens if isinstance(t, Parenthesis)), None)
+                if expect == "cte":
+                    ctes.append(identifier.get_real_name())
+                elif subquery is None:
+                    name = _identifier_name(identifier)
+                    if name:
+                        tables.append(name)
+                if subquery is not None:
+                    _collect_tables(subquery, tables, ctes)
+            expect = None
+            continue
+
+        expect = None
+        if token.is_group:
+            _collect_tables(token, tables, ctes)
+
+
+def _number(token) -> Optional[int]:
+    if token is None or token.ttype not in Number:
+        return None
+    try:
+        return int(token.value)
+    except ValueError:
+        return None
+
+
+def _find_limit(stmt: TokenList) -> Tuple[bool, Optional[int]]:
+    """
+    Locate a LIMIT or FETCH FIRST / NEXT n ROWS ONLY clause at the top level of a statement.
+    Limits inside subqueries do not bound the outer result and are ignored.
+    """
+    tokens = [t for t in stmt.tokens if not t.is_whitespace and t.ttype not in Comment]
+    for idx, token in enumerate(tokens):
+        if token.ttype is not Keyword:
+            continue
+        if token.normalized == "LIMIT":
+            value = tokens[idx + 1] if idx + 1 < len(tokens) else None
+            return True, _number(value)
+        if token.normalized == "FETCH":
+            following = tokens[idx + 1:idx + 3]
+            if not following or following[0].normalized not in ("FIRST", "NEXT"):
+                continue
+            value = following[1] if len(following) > 1 else None
+            # FETCH FIRST ROW ONLY fetches a single row
+            if value is not None and value.normalized in ("ROW", "ROWS"):
+                return True, 1
+            return True, _number(value)
+    return False, None
+
+
+def _leading_token(stmt: TokenList):
+    """
+    First meaningful token of a statement, looking inside a leading parenthesis: (SELECT ...) LIMIT 3.
+    """
+    token = stmt.token_first(skip_cm=True)
+    while isinstance(token, Parenthesis):
+        inner = [t for t in token.tokens if not t.is_whitespace and t.ttype not in Comment and t.ttype is not Punctuation]
+        if not inner:
+            break
+        token = inner[0]
+    return token
+
+
+def _normalize(statements) -> str:
+    """
+    Canonical text: comments dropped, whitespace collapsed, keywords
+    upper-cased and trailing semicolons removed. Literals are kept as-is,
+    so the fingerprint is safe to use as a result-cache key.
+    """
+    parts = []
+    for stmt in statements:
+        words = []
+        for token in stmt.flatten():
+            if token.ttype in Whitespace or token.ttype in Comment:
+                continue
+            if token.ttype in Keyword:
+                words.append(token.normalized)
+            else:
+                words.append(token.value)
+        while words and words[-1] == ";":
+            words.pop()
+        if words:
+            parts.append(" ".join(words))
+    return "; ".join(parts)
+
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def analyze_sql(sql_query: str) -> SQLAnalysis:
+    """
+    Tokenize a SQL query once and return its analysis.
+    Results are memoized per query text in a bounded LRU cache.
+    """
+    statements = [s for s in sqlparse.parse(sql_query or "") if s.token_first(skip_cm=True) is not None]
+
+    commands = []
+    tables: list = []
+    ctes: list = []
+    verbs: list = []
+    has_into = False
+    for stmt in statements:
+        first_token = _leading_token(stmt)
+        if first_token.ttype in Keyword or first_token.ttype in DML or first_token.ttype in DDL:
+            commands.append(first_token.normalized)
+        else:
+            commands.append(first_token.value.split()[0].upper())
+        _collect_tables(stmt, tables, ctes)
+        for token in stmt.flatten():
+            if token.ttype in DML or token.ttype in DDL or token.ttype in DCL:
+                verbs.append(token.normalized)
+            elif token.ttype is Keyword and token.normalized == "INTO":
+                has_into = True
+
+    cte_names = {c.lower() for c in ctes}
+    physical_tables = [t for t in dict.fromkeys(tables) if t.lower() not in cte_names]
+
+    has_limit, limit = _find_limit(statements[0]) if statements else (False, None)
+    normalized = _normalize(statements)
+
+    statement_type = statements[0].get_type() if statements else "UNKNOWN"
+    if statement_type == "UNKNOWN" and commands and commands[0] in ("SELECT", "WITH"):
+        # sqlparse does not type a statement that starts with a parenthesis
+        statement_type = "SELECT"
+
+    return SQLAnalysis(
+        statement_type=statement_type,
+        commands=tuple(commands),
+        tables=tuple(physical_tables),
+        ctes=tuple(dict.fromkeys(ctes)),
+        verbs=tuple(dict.fromkeys(verbs)),
+        has_into=has_into,
+        has_limit=has_limit,
+        limit=limit,
+        normalized=normalized,
+        fingerprint=hashlib.sha1(normalized.encode("utf-8")).hexdigest(),
+    )
+
+
+def with_limit(sql_query: str, limit: int) -> str:
+    """
+    Return the query with a LIMIT appended when it has no top-level LIMIT or FETCH FIRST.
+    """
+    if analyze_sql(sql_query).has_limit:
+        return sql_query
+    body = sql_query.strip().rstrip(";").rstrip()
+    # Keep the LIMIT out of a trailing line comment
+    separator = "\n" if "--" in body.rsplit("\n", 1)[-1] else " "
+    return f"{body}{separator}LIMIT {limit}"
@@ -0,0 +1,207 @@
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from app.sql.analysis import analyze_sql
+from app.core.metrics import stage, record_cache
+from app.config import settings
+
+# Possible guard decisions
+ALLOW = "allow"
+LIMIT = "limit"
+QUEUE = "queue"
+REJECT = "reject"
+
+PLAN_CACHE_SIZE = 512
+
+
+class QueryCostExceeded(RuntimeError):
+    """
+    Raised when the planner estimate for a query exceeds the configured maximum.
+    """
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """
+    Planner estimates for a query. Values are None when the dialect
+    does not report them (e.g. SQLite).
+    """
+    dialect: str
+    total_cost: Optional[float]
+    rows: Optional[float]  # rows the plan returns (root node), not intermediate rows
+
+
+@dataclass(frozen=True)
+class CostDecision:
+    action: str
+    query: str
+    plan: Optional[QueryPlan]
+    reason: str = ""
+
+
+# (sqlalchemy_uri, fingerprint) -> QueryPlan
+_plan_cache: "OrderedDict[Tuple[str, str], QueryPlan]" = OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+
+def _walk_json(node: Any, key: str):
+    """
+    Yield every value stored under `key` in a nested JSON plan.
+    """
+    if isinstance(node, dict):
+        for k, v in node.items():
+            if k == key:
+                yield v
+            yield from _walk_json(v, key)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk_json(item, key)
+
+
+def _max_number(values) -> Optional[float]:
+    numbers = []
+    for value in values:
+        try:
+            numbers.append(float(value))
+        except (TypeError, ValueError):
+            continue
+    return max(numbers) if numbers else None
+
+
+def _load_json(value: Any) -> Any:
+    return json.loads(value) if isinstance(value, (str, bytes)) else value
+
+
+def _explain_postgresql(conn, query: str) -> QueryPlan:
+    raw = _load_json(conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}")).scalar())
+    root = raw[0]["Plan"]
+    return QueryPlan(
+        dialect="postgresql",
+        total_cost=float(root["Total Cost"]),
+        rows=float(root["Plan Rows"]),
+    )
+
+
+def _explain_mysql(conn, query: str) -> QueryPlan:
+    raw = _load_json(conn.execute(text(f"EXPLAIN FORMAT=JSON {query}")).scalar())
+    # Tables are listed in join order; the last one produces the rows the join returns
+    produced = list(_walk_json(raw, "rows_produced_per_join"))
+    return QueryPlan(
+        dialect="mysql",
+        total_cost=_max_number(_walk_json(raw.get("query_block", {}).get("cost_info", {}), "query_cost")),
+        rows=_max_number(produced[-1:]),
+    )
+
+
+def _explain_sqlite(conn, query: str) -> QueryPlan:
+    # SQLite only reports the plan shape, not cost estimates; still fails fast on bad SQL
+    conn.execute(text(f"EXPLAIN QUERY PLAN {query}")).fetchall()
+    return QueryPlan(dialect="sqlite", total_cost=None, rows=None)
+
+
+EXPLAINERS = {
+    "postgresql": _explain_postgresql,
+    "mysql": _explain_mysql,
+    "mariadb": _explain_mysql,
+    "sqlite": _explain_sqlite,
+}
+
+
+def explain_query(query: str, engine: Engine) -> Optional[QueryPlan]:
+    """
+    Run a dialect-aware EXPLAIN (never EXPLAIN ANALYZE) through the pooled engine.
+    Plans are cached per database and query fingerprint.
+    Returns None for dialects without EXPLAIN support.
+    """
+    explainer = EXPLAINERS.get(engine.dialect.name)
+    if explainer is None:
+        return None
+
+    key = (str(engine.url), analyze_sql(query).fingerprint)
+    with _plan_cache_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None:
+            _plan_cache.move_to_end(key)
+    record_cache("sql_plan", plan is not None)
+    if plan is not None:
+        return plan
+
+    try:
+        with stage("sql_explain"), engine.connect() as conn:
+            plan = explainer(conn, query.strip().rstrip(";"))
+    except SQLAlchemyError as e:
+        raise RuntimeError(f"SQL explain error: {str(e)}")
+
+    with _plan_cache_lock:
+        _plan_cache[key] = plan
+        while len(_plan_cache) > PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+    return plan
+
+
+def tighten_limit(query: str, limit: int) -> str:
+    """
+    Bound a query to at most `limit` rows, wrapping it when its own LIMIT is larger or absent.
+    """
+    current = analyze_sql(query).limit
+    if current is not None and current <= limit:
+        return query
+    return f"SELECT * FROM ({query.strip().rstrip(';')}) AS limited_query LIMIT {limit}"
+
+
+def check_query_cost(query: str, engine: Engine, run_query: Optional[str] = None) -> CostDecision:
+    """
+    Decide how to run a query based on planner estimates of `query` as submitted.
+    The decision applies to `run_query` (default `query`), e.g. the query with the
+    executor's default LIMIT added: planning that one instead would only show the
+    LIMIT node, whose rows and cost are capped by the limit itself.
+    Decisions:
+    - reject: estimated cost above SQL_MAX_PLAN_COST
+    - queue: estimated cost above SQL_SLOW_PLAN_COST, run in the slow lane
+      (also rewritten with SQL_GUARD_LIMIT when it returns too many rows)
+    - limit: estimated result rows above SQL_MAX_PLAN_ROWS, rewritten with SQL_GUARD_LIMIT
+    - allow: everything else, including dialects without estimates
+    An outer LIMIT bounds the rows returned, not the cost of producing them,
+    so a slow query stays in the slow lane whether or not it is limited.
+    """
+    plan = explain_query(query, engine)
+    query = query if run_query is None else run_query
+    if plan is None:
+        return CostDecision(action=ALLOW, query=query, plan=None, reason="no planner estimates")
+
+    if plan.total_cost is not None and plan.total_cost > settings.SQL_MAX_PLAN_COST:
+        return CostDecision(
+            action=REJECT,
+            query=query,
+            plan=plan,
+            reason=f"estimated cost {plan.total_cost:.0f} exceeds {settings.SQL_MAX_PLAN_COST:.0f}",
+        )
+
+    too_many_rows = plan.rows is not None and plan.rows > settings.SQL_MAX_PLAN_ROWS
+    if too_many_rows:
+        query = tighten_limit(query, settings.SQL_GUARD_LIMIT)
+        rows_reason = f"estimated {plan.rows:.0f} rows exceeds {settings.SQL_MAX_PLAN_ROWS:.0f}"
+
+    if plan.total_cost is not None and plan.total_cost > settings.SQL_SLOW_PLAN_COST:
+        reason = f"estimated cost {plan.total_cost:.0f} exceeds {settings.SQL_SLOW_PLAN_COST:.0f}"
+        return CostDecision(
+            action=QUEUE,
+            query=query,
+            plan=plan,
+            reason=f"{reason}; {rows_reason}" if too_many_rows else reason,
+        )
+
+    if too_many_rows:
+        return CostDecision(action=LIMIT, query=query, plan=plan, reason=rows_reason)
+
+    return CostDecision(action=ALLOW, query=query, plan=plan)
+
+
+def clear_plan_cache():
+    with _plan_cache_lock:
+        _plan_cache.clear()
@@ -0,0 +1,181 @@
+"""
+Local dry run of generated SQL against an empty, in-process replica of the
+dashboard schema (SQLite in-memory). Queries are prepared with
+EXPLAIN QUERY PLAN, so references to tables or columns that do not exist fail
+in milliseconds instead of after a warehouse round trip.
+
+Only missing tables / columns are conclusive. Syntax or functions SQLite does
+not know (Postgres casts, INTERVAL, DATE_TRUNC, table functions such as
+generate_series / unnest, ...) are reported as inconclusive and left for the
+real database to judge, as are warehouse built-ins written without
+parentheses (LOCALTIMESTAMP, SYSDATE, CURRENT_USER, ...), which SQLite reads
+as column names. When the replica holds only part of the dashboard schema
+(retrieval picked some datasets, or a virtual dataset hides its physical
+tables), missing tables are inconclusive too.
+"""
+import logging
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from app.core.metrics import stage, record_cache
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_TABLE = "unknown_table"
+UNKNOWN_COLUMN = "unknown_column"
+INCONCLUSIVE = "inconclusive"
+
+_NO_SUCH_TABLE = re.compile(r"no such table: (\S+)")
+_NO_SUCH_COLUMN = re.compile(r"no such column: (\S+)")
+
+# Niladic built-ins of Postgres / Snowflake / Oracle / MySQL / Redshift that SQLite does not know
+DIALECT_BUILTINS = frozenset({
+    "localtime", "localtimestamp", "sysdate", "systimestamp", "current_user", "session_user",
+    "system_user", "user", "current_role", "current_schema", "current_catalog", "utc_date",
+    "utc_time", "utc_timestamp", "getdate", "rownum", "level",
+})
+
+
+@dataclass(frozen=True)
+class DryRunResult:
+    """
+    ok is False only when the query is known to be invalid for this schema.
+    """
+    ok: bool
+    error_type: Optional[str] = None
+    name: Optional[str] = None
+    message: str = ""
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class SchemaReplica:
+    """
+    Empty SQLite tables mirroring {table_name: {column_name: column_type}}.
+    Columns are declared without types: only names matter for resolution, and
+    warehouse types (ARRAY<STRING>, Nullable(String), ...) are not valid SQLite.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, str]]):
+        self.tables = {name.lower() for name in tables}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        for table_name, columns in tables.items():
+            if not columns:
+                continue
+            column_defs = ", ".join(_quote(col) for col in columns)
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table_name)} ({column_defs})")
+
+    def check(self, sql: str, complete: bool = True) -> DryRunResult:
+        """
+        complete: the replica holds every table of the dashboard, so a missing table is an error.
+        """
+        query = sql.strip().rstrip(";")
+        try:
+            with self._lock:
+                self._conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+        except sqlite3.Error as e:
+            return self._classify(str(e), query, complete)
+        return DryRunResult(ok=True)
+
+    def _classify(self, message: str, query: str, complete: bool) -> DryRunResult:
+        match = _NO_SUCH_TABLE.search(message)
+        if match:
+            name = match.group(1)
+            # A schema-qualified name for a table we know is a replica limitation, not an error
+            if name.split(".")[-1].lower() in self.tables:
+                return DryRunResult(ok=True, error_type=INCONCLUSIVE, name=name, message=message)
+            # Table-valued functions in FROM (generate_series(...), unnest(...)) are unknown to SQLite
+            if re.search(rf"(?<![\w.]){re.escape(name)}\s*\(", query, re.I):
+                return DryRunResult(ok=True, error_type=INCONCLUSIVE, name=name, message=message)
+            if not complete:
+                return DryRunResult(ok=True, error_type=INCONCLUSIVE, name=name, message=message)
+            return DryRunResult(ok=False, error_type=UNKNOWN_TABLE, name=name, message=message)
+
+        match = _NO_SUCH_COLUMN.search(message)
+        if match:
+            name = match.group(1)
+            if name.lower() in DIALECT_BUILTINS:
+                return DryRunResult(ok=True, error_type=INCONCLUSIVE, name=name, message=message)
+            return DryRunResult(ok=False, error_type=UNKNOWN_COLUMN, name=name, message=message)
+
+        return DryRunResult(ok=True, error_type=INCONCLUSIVE, message=message)
+
+    def close(self):
+        self._conn.close()
+
+
+def is_virtual_dataset(dataset: Dict[str, Any]) -> bool:
+    """
+    Superset virtual datasets are defined by a SQL query; their table_name is not a physical table.
+    """
+    return dataset.get("kind") == "virtual" or bool(dataset.get("sql"))
+
+
+def schema_is_complete(datasets: List[Dict[str, Any]]) -> bool:
+    """
+    Whether replicating `datasets` covers every table a query over them may name.
+    """
+    return not any(is_virtual_dataset(dataset) for dataset in datasets)
+
+
+# (dashboard_id, metadata version) -> SchemaReplica
+_replicas: "OrderedDict[Tuple[int, str], SchemaReplica]" = OrderedDict()
+_replicas_lock = threading.Lock()
+
+
+def get_replica(dashboard_id: int, version: str, tables: Dict[str, Dict[str, str]]) -> Optional[SchemaReplica]:
+    """
+    Return the cached replica for this dashboard version, building it on first use.
+    None when the schema cannot be replicated (e.g. a table name SQLite rejects).
+    """
+    key = (dashboard_id, version)
+    with _replicas_lock:
+        replica = _replicas.get(key)
+        if replica is not None:
+            _replicas.move_to_end(key)
+    record_cache("schema_replica", replica is not None)
+    if replica is not None:
+        return replica
+
+    try:
+        replica = SchemaReplica(tables)
+    except sqlite3.Error as e:
+        logger.warning("Cannot build schema replica for dashboard %s: %s", dashboard_id, e)
+        return None
+    with _replicas_lock:
+        _replicas[key] = replica
+        while len(_replicas) > settings.DRY_RUN_CACHE_SIZE:
+            _, evicted = _replicas.popitem(last=False)
+            evicted.close()
+    return replica
+
+
+def dry_run_sql(sql: str, dashboard_id: int, version: str, tables: Dict[str, Dict[str, str]],
+                complete: bool = True) -> DryRunResult:
+    """
+    Prepare `sql` against the dashboard's schema replica.
+    tables is SchemaAnalysis.columns: {table_name: {column_name: column_type}}.
+    Pass complete=False when `tables` is only part of the dashboard schema.
+    """
+    if not settings.DRY_RUN_ENABLED or not tables:
+        return DryRunResult(ok=True)
+    with stage("sql_dry_run"):
+        replica = get_replica(dashboard_id, version, tables)
+        if replica is None:
+            return DryRunResult(ok=True, error_type=INCONCLUSIVE, message="schema replica unavailable")
+        return replica.check(sql, complete=complete)
+
+
+def dry_run_to_http(sql: str, result: DryRunResult) -> HTTPException:
+    return HTTPException(status_code=422, detail={"error": "invalid_sql", "sql": sql, **result.as_dict()})
@@ -1,29 +1,121 @@
+import threading
+from contextlib import nullcontext
 from typing import List, Dict, Any
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
+from app.sql.analysis import with_limit
+from app.sql.cost_guard import check_query_cost, QueryCostExceeded, REJECT, QUEUE
+from app.core.metrics import stage, QUEUE_DEPTH
+from app.core.deadline import current_deadline, check_deadline, remaining_budget
+from app.config import settings
 
+# One pooled engine per database URI, shared across requests
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
 
-def execute_sql_dynamic(query: str, sqlalchemy_uri: str, limit: int = 100, timeout: int = 10) -> List[Dict[str, Any]]:
+# Expensive queries (per the cost guard) run in a narrow slow lane
+_slow_lane = threading.BoundedSemaphore(settings.SQL_SLOW_QUEUE_CONCURRENCY)
+
+
+def get_engine(sqlalchemy_uri: str) -> Engine:
     """
-    Execute a SQL query safely against the given database URI.
-    - Enforces LIMIT if not present
-    - Enforces statement timeout
-    - Returns list of rows as dictionaries
+    Return the pooled engine for a database URI, creating it on first use.
+    """
+    engine = _engines.get(sqlalchemy_uri)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(sqlalchemy_uri)
+            if engine is None:
+                engine = create_engine(sqlalchemy_uri, pool_pre_ping=True)
+                _engines[sqlalchemy_uri] = engine
+    return engine
+
+
+def pooled_engines() -> List[Engine]:
+    return list(_engines.values())
+
+
+def _set_statement_timeout(conn, timeout: float):
+    """
+    Apply a transaction-scoped statement timeout where the dialect supports it.
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT set_config('statement_timeout', :ms, true)"), {"ms": str(max(1, int(timeout * 1000)))})
+
+
+def _cancel_running_query(conn):
+    """
+    Abort the statement running on `conn` from another thread, where the driver allows it
+    (psycopg connection.cancel(), sqlite3 interrupt()). Other drivers rely on the statement timeout.
     """
-    # Add LIMIT if not present
-    if "limit" not in query.lower():
-        query = f"{query.rstrip(';')} LIMIT {limit}"
+    dbapi_conn = conn.connection.dbapi_connection
+    cancel = getattr(dbapi_conn, "cancel", None) or getattr(dbapi_conn, "interrupt", None)
+    if cancel is not None:
+        cancel()
 
-    results: List[Dict[str, Any]] = []
-    engine = create_engine(sqlalchemy_uri, connect_args={"options": f"-c statement_timeout={timeout*1000}"})
 
+def _run_query(engine: Engine, query: str, timeout: float) -> List[Dict[str, Any]]:
+    deadline = current_deadline()
     try:
-        with engine.connect() as conn:
-            result_proxy = conn.execute(text(query))
-            results = [dict(row) for row in result_proxy]
+        with stage("sql_execution"), engine.connect() as conn:
+            _set_statement_timeout(conn, timeout)
+            abort = nullcontext() if deadline is None else deadline.on_cancel(lambda: _cancel_running_query(conn))
+            with abort:
+                result_proxy = conn.execute(text(query))
+                return [dict(row._mapping) for row in result_proxy]
     except SQLAlchemyError as e:
+        # A cancelled or timed-out statement surfaces as a driver error; report the real cause
+        check_deadline("sql_execution")
         raise RuntimeError(f"SQL execution error: {str(e)}")
-    finally:
-        engine.dispose()
 
-    return results
+
+def execute_sql(query: str, limit: int = 100, timeout: int = 10) -> List[Dict[str, Any]]:
+    """
+    Execute a SQL query against the service database (settings.database_uri).
+    """
+    if not settings.database_uri:
+        raise RuntimeError("SQL execution error: no database configured (SQL_DATABASE_URI / POSTGRES_HOST)")
+    return execute_sql_dynamic(query, sqlalchemy_uri=settings.database_uri, limit=limit, timeout=timeout)
+
+
+def execute_sql_dynamic(query: str, sqlalchemy_uri: str, limit: int = 100, timeout: int = 10,
+                        cost_guard: bool = True) -> List[Dict[str, Any]]:
+    """
+    Execute a SQL query safely against the given database URI.
+    - Enforces LIMIT if not present
+    - Checks planner estimates (EXPLAIN) before running, see app.sql.cost_guard
+    - Enforces statement timeout (bounded by the request deadline) and cancels
+      the query server side if the request is abandoned
+    - Returns list of rows as dictionaries
+    """
+    # The statement timeout is whatever is left of the request budget, at most `timeout`
+    timeout = remaining_budget(timeout, stage="sql_execution")
+
+    # Add LIMIT if the statement has no top-level LIMIT clause
+    limited_query = with_limit(query, limit)
+    engine = get_engine(sqlalchemy_uri)
+
+    if not (cost_guard and settings.SQL_COST_GUARD_ENABLED):
+        return _run_query(engine, limited_query, timeout)
+
+    # Plan the query as submitted: the injected LIMIT would hide its real cost and row count
+    decision = check_query_cost(query, engine, run_query=limited_query)
+    if decision.action == REJECT:
+        raise QueryCostExceeded(f"Query rejected by cost guard: {decision.reason}")
+
+    if decision.action == QUEUE:
+        QUEUE_DEPTH.labels("sql_slow_lane").inc()
+        try:
+            acquired = _slow_lane.acquire(timeout=remaining_budget(settings.SQL_SLOW_QUEUE_TIMEOUT))
+        finally:
+            QUEUE_DEPTH.labels("sql_slow_lane").dec()
+        if not acquired:
+            check_deadline("sql_slow_lane")
+            raise RuntimeError("SQL execution error: slow query lane is full")
+        try:
+            return _run_query(engine, decision.query, remaining_budget(settings.SQL_SLOW_QUEUE_TIMEOUT))
+        finally:
+            _slow_lane.release()
+
+    return _run_query(engine, decision.query, timeout)
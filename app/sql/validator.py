@@ -1,6 +1,4 @@
-import sqlparse
-from sqlparse.sql import IdentifierList, Identifier
-from sqlparse.tokens import Keyword, DML
+from app.sql.analysis import analyze_sql
 
 READ_ONLY_COMMANDS = {"SELECT", "WITH"}
 
@@ -17,22 +15,26 @@ def validate_sql(sql: str) -> tuple[bool, str]:
     if not sql or not sql.strip():
         return False, "SQL query is empty"
 
-    statements = sqlparse.parse(sql)
-    for stmt in statements:
-        # Identify the first keyword
-        first_token = stmt.token_first(skip_cm=True)
-        if first_token is None:
-            continue
+    analysis = analyze_sql(sql)
+    for command in analysis.commands:
+        if command in FORBIDDEN_COMMANDS:
+            return False, f"Forbidden SQL command detected: {command}"
+        if command not in READ_ONLY_COMMANDS:
+            return False, f"Only read-only SQL allowed. Found: {command}"
 
-        if first_token.ttype is Keyword or first_token.ttype is DML:
-            command = first_token.value.upper()
-            if command in FORBIDDEN_COMMANDS:
-                return False, f"Forbidden SQL command detected: {command}"
-            if command not in READ_ONLY_COMMANDS:
-                return False, f"Only read-only SQL allowed. Found: {command}"
+    # Data-modifying statements can hide inside CTEs and subqueries: WITH d AS (DELETE ... RETURNING *)
+    for verb in analysis.verbs:
+        if verb in FORBIDDEN_COMMANDS:
+            return False, f"Forbidden SQL command detected: {verb}"
+        if verb != "SELECT":
+            return False, f"Only read-only SQL allowed. Found: {verb}"
+
+    # SELECT ... INTO creates a table
+    if analysis.has_into:
+        return False, "Forbidden SQL clause detected: INTO"
 
     # Optional: enforce LIMIT clause
-    if "LIMIT" not in sql.upper():
+    if not analysis.has_limit:
         return False, "SQL query missing LIMIT clause"
 
     return True, "SQL is valid"
@@ -0,0 +1,281 @@
+"""
+Offline stand-ins for Superset: a synthetic catalog generator, a mock Superset
+REST API served from a local thread, and a SQLite replica of the catalog tables
+so chart SQL can actually execute.
+
+Standalone (for load tests against a running service):
+    python -m benchmarks.fake_superset --dashboards 50 --charts 300 --datasets 40 \\
+        --columns 60 --sql-complexity 3 --sqlite ./data/synthetic.db --port 8088
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+COLUMN_TYPES = ["INTEGER", "REAL", "TEXT", "DATE"]
+
+
+def _chart_sql(table: Dict, join_tables: List[Dict], complexity: int, rng: random.Random) -> str:
+    """
+    Build chart SQL of increasing complexity:
+    1 = aggregate + GROUP BY, 2 = adds a JOIN, 3+ = CTE, extra JOINs and a subquery filter.
+    """
+    dims = [c["name"] for c in table["columns"] if c["type"] in ("TEXT", "DATE")] or [table["columns"][0]["name"]]
+    metrics = [c["name"] for c in table["columns"] if c["type"] in ("INTEGER", "REAL")] or [table["columns"][0]["name"]]
+    dim, metric = rng.choice(dims), rng.choice(metrics)
+    base = table["table_name"]
+
+    if complexity <= 1 or not join_tables:
+        return f"SELECT {dim}, SUM({metric}) AS total FROM {base} GROUP BY {dim} ORDER BY total DESC LIMIT 100"
+
+    joins = join_tables[:max(1, complexity - 1)]
+    join_sql = " ".join(f"JOIN {j['table_name']} ON t0.id = {j['table_name']}.id" for j in joins)
+    if complexity == 2:
+        return (
+            f"SELECT t0.{dim}, SUM(t0.{metric}) AS total FROM {base} t0 {join_sql} "
+            f"GROUP BY t0.{dim} ORDER BY total DESC LIMIT 100"
+        )
+    return (
+        f"WITH base AS (SELECT t0.id, t0.{dim}, t0.{metric} FROM {base} t0 {join_sql} "
+        f"WHERE t0.id IN (SELECT id FROM {base} WHERE {metric} IS NOT NULL)) "
+        f"SELECT {dim}, SUM({metric}) AS total, COUNT(*) AS n FROM base "
+        f"GROUP BY {dim} ORDER BY total DESC LIMIT 100"
+    )
+
+
+def make_catalog(
+    dashboards: int = 1,
+    charts_per_dashboard: int = 8,
+    datasets_per_dashboard: int = 3,
+    columns_per_dataset: int = 10,
+    sql_complexity: int = 1,
+    sqlalchemy_uri: Optional[str] = None,
+    seed: int = 0,
+) -> Dict[str, Dict[int, Dict[str, Any]]]:
+    """
+    Generate a synthetic Superset catalog:
+    {"dashboards": {id: ...}, "charts": {id: ...}, "datasets": {id: ...}}
+    Dashboard payloads use the shape app.models.metadata.Dashboard expects.
+    """
+    rng = random.Random(seed)
+    catalog: Dict[str, Dict[int, Dict[str, Any]]] = {"dashboards": {}, "charts": {}, "datasets": {}}
+    chart_id = dataset_id = 0
+
+    for dashboard_id in range(1, dashboards + 1):
+        datasets = []
+        for _ in range(datasets_per_dashboard):
+            dataset_id += 1
+            columns = [{"name": "id", "type": "INTEGER"}]
+            # Shared dimension names give analyze_schema / training packs joins to infer
+            columns += [
+                {"name": f"col_{i}", "type": COLUMN_TYPES[i % len(COLUMN_TYPES)]}
+                for i in range(1, columns_per_dataset)
+            ]
+            dataset = {
+                "id": dataset_id,
+                "table_name": f"table_{dataset_id}",
+                "columns": columns,
+                "description": f"Synthetic dataset {dataset_id}",
+                "database": {"sqlalchemy_uri": sqlalchemy_uri},
+            }
+            catalog["datasets"][dataset_id] = dataset
+            datasets.append(dataset)
+
+        charts = []
+        for _ in range(charts_per_dashboard):
+            chart_id += 1
+            table = rng.choice(datasets)
+            others = [d for d in datasets if d is not table]
+            chart = {
+                "id": chart_id,
+                "name": f"Chart {chart_id}",
+                "dataset_id": table["id"],
+                "viz_type": rng.choice(["table", "bar", "line", "pie", "big_number"]),
+                "sql": _chart_sql(table, others, sql_complexity, rng),
+                "description": f"Synthetic chart {chart_id}",
+            }
+            catalog["charts"][chart_id] = chart
+            charts.append(chart)
+
+        catalog["dashboards"][dashboard_id] = {
+            "id": dashboard_id,
+            "name": f"Dashboard {dashboard_id}",
+            "description": f"Synthetic dashboard with {len(charts)} charts",
+            "charts": charts,
+            "datasets": [{k: v for k, v in d.items() if k != "database"} for d in datasets],
+        }
+    return catalog
+
+
+def create_sqlite_replica(catalog: Dict, path: str, rows_per_table: int = 200, seed: int = 0):
+    """
+    Create every catalog table in a SQLite file and fill it with random rows.
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    try:
+        for dataset in catalog["datasets"].values():
+            table = dataset["table_name"]
+            columns = dataset["columns"]
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+            column_defs = ", ".join(f"{c['name']} {c['type']}" for c in columns)
+            conn.execute(f"CREATE TABLE {table} ({column_defs})")
+            rows = []
+            for row_id in range(1, rows_per_table + 1):
+                row = []
+                for col in columns:
+                    if col["name"] == "id":
+                        row.append(row_id)
+                    elif col["type"] == "INTEGER":
+                        row.append(rng.randint(0, 1000))
+                    elif col["type"] == "REAL":
+                        row.append(rng.random() * 1000)
+                    elif col["type"] == "DATE":
+                        row.append(f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}")
+                    else:
+                        row.append(rng.choice(["north", "south", "east", "west"]))
+                rows.append(row)
+            conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' for _ in columns)})", rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeSupersetServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: Any):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.server.latency_seconds:
+            time.sleep(self.server.latency_seconds)
+        self.server.count_request()
+
+        catalog = self.server.catalog
+        parsed = urlparse(self.path)
+        path = parsed.path.rstrip("/")
+
+        listing = re.fullmatch(r"/api/v1/(dashboard|chart|dataset)", path)
+        if listing:
+            objects = catalog[f"{listing.group(1)}s"]
+            query = parse_qs(parsed.query).get("q", [""])[0]
+            page = int((re.search(r"page:(\d+)", query) or [0, 0])[1])
+            page_size = int((re.search(r"page_size:(\d+)", query) or [0, 100])[1])
+            ids = sorted(objects)[page * page_size:(page + 1) * page_size]
+            return self._send(200, {"result": [{"id": i} for i in ids], "count": len(objects)})
+
+        match = re.fullmatch(r"/api/v1/(dashboard|chart|dataset)/(\d+)(/data)?", path)
+        if not match:
+            return self._send(404, {"message": "Not found"})
+        kind, object_id, data = match.group(1), int(match.group(2)), match.group(3)
+        obj = catalog[f"{kind}s"].get(object_id)
+        if obj is None:
+            return self._send(404, {"message": f"{kind} {object_id} not found"})
+
+        if kind == "dashboard":
+            # Top-level fields for fetch_dashboard_metadata, "result" for SupersetClient
+            return self._send(200, {**obj, "result": obj})
+        if kind == "chart" and data:
+            return self._send(200, {"result": [{"query": obj["sql"]}]})
+        if kind == "dataset":
+            payload = {
+                **obj,
+                "columns": [{"column_name": c["name"], "type": c["type"]} for c in obj["columns"]],
+            }
+            return self._send(200, {**payload, "result": payload})
+        return self._send(200, {"result": obj})
+
+
+class FakeSupersetServer(ThreadingHTTPServer):
+    """
+    Mock Superset REST API (/api/v1/dashboard, /chart, /chart/{id}/data, /dataset)
+    serving a catalog from memory. Optional per-request latency simulates the network.
+    """
+    daemon_threads = True
+
+    def __init__(self, catalog: Dict, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0):
+        super().__init__((host, port), _Handler)
+        self.catalog = catalog
+        self.latency_seconds = latency_ms / 1000.0
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def count_request(self):
+        # Handlers run on one thread per connection
+        with self._count_lock:
+            self.request_count += 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeSupersetServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-superset", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a synthetic Superset catalog from a local mock API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8088)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request")
+    parser.add_argument("--dashboards", type=int, default=10)
+    parser.add_argument("--charts", type=int, default=100, help="Charts per dashboard")
+    parser.add_argument("--datasets", type=int, default=20, help="Datasets per dashboard")
+    parser.add_argument("--columns", type=int, default=30, help="Columns per dataset")
+    parser.add_argument("--sql-complexity", type=int, default=2, help="1 = aggregate, 2 = join, 3+ = CTE/subquery")
+    parser.add_argument("--sqlite", help="Also write a SQLite replica here and point datasets at it")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per table in the SQLite replica")
+    parser.add_argument("--sqlalchemy-uri", help="Database URI reported for datasets (instead of --sqlite)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    uri = args.sqlalchemy_uri or (f"sqlite:///{os.path.abspath(args.sqlite)}" if args.sqlite else None)
+    catalog = make_catalog(
+        dashboards=args.dashboards,
+        charts_per_dashboard=args.charts,
+        datasets_per_dashboard=args.datasets,
+        columns_per_dataset=args.columns,
+        sql_complexity=args.sql_complexity,
+        sqlalchemy_uri=uri,
+        seed=args.seed,
+    )
+    if args.sqlite:
+        create_sqlite_replica(catalog, args.sqlite, rows_per_table=args.rows, seed=args.seed)
+
+    server = FakeSupersetServer(catalog, host=args.host, port=args.port, latency_ms=args.latency_ms)
+    print(
+        f"Mock Superset on {server.base_url}: {len(catalog['dashboards'])} dashboards, "
+        f"{len(catalog['charts'])} charts, {len(catalog['datasets'])} datasets"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
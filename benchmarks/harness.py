@@ -0,0 +1,123 @@
+"""
+Timing, result recording and run comparison for the benchmark suite.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkRun:
+    """
+    Collects benchmark timings and writes them as JSON:
+    {"meta": {...}, "results": {name: {"n", "mean_ms", "p50_ms", "p95_ms", "min_ms", "max_ms", ...}}}
+    """
+
+    def __init__(self, repeat: int = 20, warmup: int = 2):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.skipped: Dict[str, str] = {}
+        self.meta = {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "git_commit": _git_commit(),
+        }
+
+    def bench(self, name: str, fn: Callable[[], Any], repeat: Optional[int] = None,
+              warmup: Optional[int] = None, items: int = 1) -> Dict[str, Any]:
+        """
+        Time `fn` `repeat` times after `warmup` untimed calls.
+        `items` is the number of units one call processes (for items/s).
+        """
+        for _ in range(self.warmup if warmup is None else warmup):
+            fn()
+
+        samples = []
+        for _ in range(self.repeat if repeat is None else repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+
+        ordered = sorted(samples)
+        mean = statistics.fmean(samples)
+        result = {
+            "n": len(samples),
+            "mean_ms": mean * 1000,
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p95_ms": percentile(ordered, 95) * 1000,
+            "min_ms": ordered[0] * 1000,
+            "max_ms": ordered[-1] * 1000,
+            "items_per_second": items / mean if mean else 0.0,
+        }
+        self.results[name] = result
+        print(f"{name:<45} p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  n={result['n']}")
+        return result
+
+    def skip(self, name: str, reason: str):
+        self.skipped[name] = reason
+        print(f"{name:<45} skipped: {reason}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"meta": self.meta, "results": self.results, "skipped": self.skipped}
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def load_run(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_runs(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.15,
+                 metric: str = "p50_ms", min_delta_ms: float = 0.05) -> List[Dict[str, Any]]:
+    """
+    Compare benchmarks present in both runs. A benchmark regresses when
+    `metric` grew by more than `threshold` (fraction) over the baseline and
+    by more than `min_delta_ms`, so sub-microsecond timer noise is ignored.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get(metric):
+            continue
+        change = (result[metric] - base[metric]) / base[metric]
+        rows.append({
+            "name": name,
+            "baseline": base[metric],
+            "current": result[metric],
+            "change": change,
+            "regression": change > threshold and result[metric] - base[metric] > min_delta_ms,
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], metric: str = "p50_ms"):
+    print(f"\n{'benchmark':<45} {'baseline':>12} {'current':>12} {'change':>9}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['name']:<45} {row['baseline']:12.3f} {row['current']:12.3f} "
+            f"{row['change'] * 100:+8.1f}%{flag}"
+        )
@@ -0,0 +1,236 @@
+"""
+End-to-end load driver for the insights endpoints.
+
+Run the service against a mock Superset (python -m benchmarks.fake_superset ...),
+then drive traffic at a fixed concurrency with a weighted request mix:
+
+    python -m benchmarks.loadgen --base-url http://localhost:8000 --concurrency 16 \\
+        --duration 60 --dashboards 1-50 --mix get_insights=8,post_insights=2 \\
+        --skew 1.1 --pid 1234 --pid 1235 --output load.json
+
+Reports throughput, p50/p95/p99 latency, error rates by status and the RSS of
+the service worker processes (sampled from /proc, or psutil when installed).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+import requests
+from benchmarks.harness import percentile
+
+# name -> (method, path template, JSON body builder)
+REQUEST_TYPES: Dict[str, Tuple[str, str, Optional[Callable[[int], Dict]]]] = {
+    "get_insights": ("GET", "/insights/{dashboard_id}", None),
+    "post_insights": ("POST", "/insights", lambda dashboard_id: {"dashboard_id": dashboard_id}),
+    "health": ("GET", "/health", None),
+}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in REQUEST_TYPES:
+            raise argparse.ArgumentTypeError(f"unknown request type {name!r} (choose from {sorted(REQUEST_TYPES)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_ids(value: str) -> List[int]:
+    ids: List[int] = []
+    for part in value.split(","):
+        start, _, end = part.partition("-")
+        ids.extend(range(int(start), int(end or start) + 1))
+    return ids
+
+
+def process_rss_bytes(pid: int) -> Optional[int]:
+    """
+    Resident set size of a process, or None if it cannot be read.
+    """
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+class RSSSampler(threading.Thread):
+    """
+    Samples worker RSS periodically and keeps the peak per PID.
+    """
+
+    def __init__(self, pids: List[int], interval: float = 1.0):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.pids = pids
+        self.interval = interval
+        self.peak: Dict[int, int] = {}
+        self.last: Dict[int, int] = {}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            for pid in self.pids:
+                rss = process_rss_bytes(pid)
+                if rss is not None:
+                    self.last[pid] = rss
+                    self.peak[pid] = max(rss, self.peak.get(pid, 0))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=self.interval * 2)
+
+
+class LoadDriver:
+    """
+    Closed-loop load: `concurrency` workers each send one request at a time
+    until the duration or request budget is exhausted.
+    """
+
+    def __init__(self, base_url: str, dashboard_ids: List[int], mix: Dict[str, float],
+                 concurrency: int = 8, timeout: float = 120.0, skew: float = 0.0, seed: int = 0):
+        self.base_url = base_url.rstrip("/")
+        self.dashboard_ids = dashboard_ids
+        self.mix_names = list(mix)
+        self.mix_weights = [mix[n] for n in self.mix_names]
+        self.concurrency = concurrency
+        self.timeout = timeout
+        # Zipf-like popularity: weight 1/rank^skew (0 = uniform)
+        self.dashboard_weights = [1.0 / (rank ** skew) for rank in range(1, len(dashboard_ids) + 1)]
+        self.seed = seed
+        self._lock = threading.Lock()
+        self.samples: List[Tuple[str, float, str]] = []  # (request type, seconds, outcome)
+
+    def _one_request(self, session: requests.Session, rng: random.Random) -> Tuple[str, float, str]:
+        name = rng.choices(self.mix_names, weights=self.mix_weights)[0]
+        dashboard_id = rng.choices(self.dashboard_ids, weights=self.dashboard_weights)[0]
+        method, path, body = REQUEST_TYPES[name]
+        url = self.base_url + path.format(dashboard_id=dashboard_id)
+        start = time.perf_counter()
+        try:
+            resp = session.request(method, url, json=body(dashboard_id) if body else None, timeout=self.timeout)
+            outcome = str(resp.status_code)
+        except requests.Timeout:
+            outcome = "timeout"
+        except requests.RequestException:
+            outcome = "connection_error"
+        return name, time.perf_counter() - start, outcome
+
+    def _worker(self, worker_id: int, deadline: float, budget: List[int]):
+        rng = random.Random(self.seed + worker_id)
+        with requests.Session() as session:
+            while time.monotonic() < deadline:
+                with self._lock:
+                    if budget[0] == 0:
+                        return
+                    budget[0] -= 1
+                sample = self._one_request(session, rng)
+                with self._lock:
+                    self.samples.append(sample)
+
+    def run(self, duration: float, max_requests: int = -1) -> float:
+        deadline = time.monotonic() + duration
+        budget = [max_requests]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="loadgen") as pool:
+            futures = [pool.submit(self._worker, worker_id, deadline, budget) for worker_id in range(self.concurrency)]
+            # Surface worker exceptions instead of reporting a silently short run
+            for future in futures:
+                future.result()
+        return time.perf_counter() - start
+
+
+def summarize(samples: List[Tuple[str, float, str]], wall_seconds: float) -> Dict:
+    def stats(latencies: List[float], outcomes: Counter) -> Dict:
+        ordered = sorted(latencies)
+        total = len(ordered)
+        errors = sum(n for outcome, n in outcomes.items() if not outcome.startswith("2"))
+        return {
+            "requests": total,
+            "throughput_rps": total / wall_seconds if wall_seconds else 0.0,
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p95_ms": percentile(ordered, 95) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+            "error_rate": errors / total if total else 0.0,
+            "outcomes": dict(outcomes),
+        }
+
+    report = {"wall_seconds": wall_seconds, "overall": stats([s[1] for s in samples], Counter(s[2] for s in samples))}
+    report["by_request"] = {
+        name: stats([s[1] for s in samples if s[0] == name], Counter(s[2] for s in samples if s[0] == name))
+        for name in sorted({s[0] for s in samples})
+    }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load driver for the insights endpoints")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=-1, help="Stop after this many requests (-1 = no cap)")
+    parser.add_argument("--dashboards", type=parse_ids, default=parse_ids("1-10"), help="IDs, e.g. 1-50,70")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("get_insights=1"),
+                        help=f"Weighted request mix, e.g. get_insights=8,post_insights=2 ({', '.join(REQUEST_TYPES)})")
+    parser.add_argument("--skew", type=float, default=0.0, help="Dashboard popularity skew (0 = uniform, ~1 = Zipf)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--pid", type=int, action="append", default=[], help="Service worker PID to sample RSS from")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    sampler = RSSSampler(args.pid)
+    if args.pid:
+        sampler.start()
+
+    driver = LoadDriver(
+        args.base_url, args.dashboards, args.mix,
+        concurrency=args.concurrency, timeout=args.timeout, skew=args.skew, seed=args.seed,
+    )
+    wall_seconds = driver.run(args.duration, args.requests)
+
+    if args.pid:
+        sampler.stop()
+    report = summarize(driver.samples, wall_seconds)
+    report["config"] = {
+        "base_url": args.base_url,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        "dashboards": len(args.dashboards),
+        "skew": args.skew,
+    }
+    report["worker_rss_mb"] = {
+        str(pid): {"peak": sampler.peak[pid] / 2**20, "last": sampler.last[pid] / 2**20}
+        for pid in sampler.peak
+    }
+
+    overall = report["overall"]
+    print(
+        f"{overall['requests']} requests in {wall_seconds:.1f}s: {overall['throughput_rps']:.2f} req/s, "
+        f"p50 {overall['p50_ms']:.0f} ms, p95 {overall['p95_ms']:.0f} ms, p99 {overall['p99_ms']:.0f} ms, "
+        f"errors {overall['error_rate'] * 100:.1f}%"
+    )
+    for pid, rss in report["worker_rss_mb"].items():
+        print(f"worker {pid}: peak RSS {rss['peak']:.0f} MiB")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
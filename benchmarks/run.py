@@ -0,0 +1,224 @@
+"""
+Component micro-benchmarks, fully offline.
+
+Stand-ins: a mock Superset API (benchmarks.fake_superset), a SQLite replica of
+the synthetic catalog (or --database-uri for a local Postgres), a throwaway
+vector store directory and a local embedding model (--embedding-model, e.g. a
+path to a tiny sentence-transformers checkpoint). HF hub access is disabled.
+The training_pack suite needs a local Redis (redis-server) for the sample-row
+cache and is skipped when none is reachable.
+
+Usage:
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --suite sql --suite executor --compare bench.json
+    python -m benchmarks.run --embedding-model ./models/tiny-minilm --suite embedding --suite vector_store
+"""
+import argparse
+import logging
+import os
+import shutil
+import socket
+import sys
+import tempfile
+from typing import Callable, Dict
+from benchmarks.fake_superset import FakeSupersetServer, make_catalog, create_sqlite_replica
+from benchmarks.harness import BenchmarkRun, load_run, compare_runs, print_comparison
+
+LONG_SQL_REPEAT = 40
+
+
+def _long_sql(catalog: Dict) -> str:
+    """
+    A long, LLM-style query: many chart queries combined with UNION ALL.
+    """
+    parts = [f"SELECT * FROM ({c['sql']}) AS q{i}" for i, c in enumerate(catalog["charts"].values())]
+    parts = (parts * (LONG_SQL_REPEAT // max(len(parts), 1) + 1))[:LONG_SQL_REPEAT]
+    return " UNION ALL ".join(parts) + " LIMIT 500"
+
+
+def suite_sql(run: BenchmarkRun, ctx: Dict):
+    from app.sql.analysis import analyze_sql
+    from app.sql.validator import validate_sql
+    from app.sql.parser import extract_tables, is_select_query, clean_query
+
+    chart_sql = next(iter(ctx["catalog"]["charts"].values()))["sql"]
+    long_sql = _long_sql(ctx["catalog"])
+
+    def cold(fn, query):
+        def call():
+            analyze_sql.cache_clear()
+            fn(query)
+        return call
+
+    run.bench("sql.analyze_sql.cold", cold(analyze_sql, chart_sql))
+    run.bench("sql.analyze_sql.long.cold", cold(analyze_sql, long_sql), repeat=5)
+    run.bench("sql.validate_sql.cold", cold(validate_sql, chart_sql))
+    run.bench("sql.validate_sql.warm", lambda: validate_sql(chart_sql), repeat=1000)
+    run.bench("sql.validate_sql.long.cold", cold(validate_sql, long_sql), repeat=5)
+    run.bench("sql.extract_tables.cold", cold(extract_tables, chart_sql))
+    run.bench("sql.is_select_query.warm", lambda: is_select_query(chart_sql), repeat=1000)
+    run.bench("sql.clean_query", lambda: clean_query(chart_sql))
+
+
+def suite_schema(run: BenchmarkRun, ctx: Dict):
+    from app.core.schema_analyzer import analyze_schema
+
+    datasets = list(ctx["catalog"]["datasets"].values())
+    run.bench("schema.analyze_schema", lambda: analyze_schema(datasets), items=len(datasets))
+
+
+def suite_executor(run: BenchmarkRun, ctx: Dict):
+    from app.sql.executor import execute_sql_dynamic
+
+    uri = ctx["database_uri"]
+    chart_sql = next(iter(ctx["catalog"]["charts"].values()))["sql"]
+    run.bench("executor.execute_sql_dynamic", lambda: execute_sql_dynamic(chart_sql, uri, limit=50))
+    run.bench(
+        "executor.execute_sql_dynamic.no_guard",
+        lambda: execute_sql_dynamic(chart_sql, uri, limit=50, cost_guard=False),
+    )
+
+
+def _redis_reachable() -> bool:
+    from app.config import settings
+
+    try:
+        with socket.create_connection((settings.REDIS_HOST, settings.REDIS_PORT), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+def suite_training_pack(run: BenchmarkRun, ctx: Dict):
+    from app.core.training_pack import build_training_pack
+
+    if not _redis_reachable():
+        # redis-py retries refused connections with backoff, which would dominate the timing
+        run.skip("training_pack", "Redis not reachable (start a local redis-server)")
+        return
+
+    dashboard = ctx["catalog"]["dashboards"][1]
+    run.bench("training_pack.build_training_pack", lambda: build_training_pack(dashboard), repeat=5, warmup=1)
+
+
+def suite_embedding(run: BenchmarkRun, ctx: Dict):
+    from app.llm.embeddings import get_embedding, get_embeddings
+
+    texts = [c["sql"] for c in ctx["catalog"]["charts"].values()]
+    run.bench("embedding.get_embedding.short", lambda: get_embedding("revenue by region"))
+    run.bench("embedding.get_embedding.chart_sql", lambda: get_embedding(texts[0]))
+    run.bench("embedding.get_embeddings.batch", lambda: get_embeddings(texts), repeat=5, items=len(texts))
+
+
+def suite_vector_store(run: BenchmarkRun, ctx: Dict):
+    from app.llm.embeddings import get_embeddings
+    from app.llm.vector_store import VectorStore
+    from app.llm.documents import CHART_SQL, doc_id
+
+    store = VectorStore(persist_path=os.path.join(ctx["workdir"], "vector_bench"))
+    charts = list(ctx["catalog"]["charts"].values())
+    ids = [doc_id(CHART_SQL, c["id"]) for c in charts]
+    texts = [c["sql"] for c in charts]
+    embeddings = get_embeddings(texts)
+
+    run.bench("vector_store.add_documents", lambda: store.add_documents(ids, texts, embeddings), repeat=5,
+              items=len(ids))
+    run.bench("vector_store.query.top5", lambda: store.query("total revenue by region", top_k=5))
+
+
+def suite_ingest(run: BenchmarkRun, ctx: Dict):
+    from app.core.bulk_ingest import ingest_dashboards
+
+    dashboard_ids = list(ctx["catalog"]["dashboards"])
+    run.bench(
+        "ingest.ingest_dashboards",
+        lambda: ingest_dashboards(dashboard_ids, workers=4, checkpoint_path=None),
+        repeat=3,
+        warmup=1,
+        items=len(dashboard_ids),
+    )
+
+
+SUITES: Dict[str, Callable[[BenchmarkRun, Dict], None]] = {
+    "sql": suite_sql,
+    "schema": suite_schema,
+    "executor": suite_executor,
+    "training_pack": suite_training_pack,
+    "embedding": suite_embedding,
+    "vector_store": suite_vector_store,
+    "ingest": suite_ingest,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline component micro-benchmarks")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="Suites to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed iterations per benchmark")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Regression threshold (fraction of p50)")
+    parser.add_argument("--database-uri", help="SQLAlchemy URI of a local database (default: SQLite replica)")
+    parser.add_argument("--embedding-model", help="Local embedding model name or path")
+    parser.add_argument("--dashboards", type=int, default=3)
+    parser.add_argument("--charts", type=int, default=12, help="Charts per dashboard")
+    parser.add_argument("--datasets", type=int, default=4, help="Datasets per dashboard")
+    parser.add_argument("--columns", type=int, default=12, help="Columns per dataset")
+    parser.add_argument("--sql-complexity", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    workdir = tempfile.mkdtemp(prefix="openpulse-bench-")
+    database_uri = args.database_uri or f"sqlite:///{os.path.join(workdir, 'warehouse.db')}"
+    catalog = make_catalog(
+        dashboards=args.dashboards,
+        charts_per_dashboard=args.charts,
+        datasets_per_dashboard=args.datasets,
+        columns_per_dataset=args.columns,
+        sql_complexity=args.sql_complexity,
+        sqlalchemy_uri=database_uri,
+    )
+    if not args.database_uri:
+        create_sqlite_replica(catalog, os.path.join(workdir, "warehouse.db"))
+
+    server = FakeSupersetServer(catalog).start()
+
+    # Must be set before any app module reads settings
+    os.environ.update({
+        "SUPERSET_BASE_URL": server.base_url,
+        "SUPERSET_API_KEY": "benchmark",
+        "SQL_DATABASE_URI": database_uri,
+        "VECTOR_STORE_PATH": os.path.join(workdir, "vector_db"),
+        "HF_HUB_OFFLINE": "1",
+        "TRANSFORMERS_OFFLINE": "1",
+    })
+    if args.embedding_model:
+        os.environ["EMBEDDING_MODEL_NAME"] = args.embedding_model
+
+    run = BenchmarkRun(repeat=args.repeat)
+    ctx = {"catalog": catalog, "database_uri": database_uri, "workdir": workdir}
+    try:
+        for name in args.suite or list(SUITES):
+            try:
+                SUITES[name](run, ctx)
+            except ImportError as e:
+                run.skip(name, f"missing dependency: {e}")
+            except OSError as e:
+                # e.g. the embedding model is not available locally
+                run.skip(name, str(e).splitlines()[0])
+    finally:
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        run.save(args.output)
+
+    if args.compare:
+        rows = compare_runs(load_run(args.compare), run.to_dict(), threshold=args.threshold)
+        print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
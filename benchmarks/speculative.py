@@ -0,0 +1,127 @@
+"""
+Assisted (speculative) decoding benchmark on SQL-generation prompts.
+
+Builds insight prompts (app.llm.prompts) from synthetic dashboards, decodes
+each greedily with the main model alone and with the draft model, checks the
+outputs are identical, and reports latency, speedup and draft acceptance:
+
+    python -m benchmarks.speculative --model ./models/main --draft ./models/draft \\
+        --prompts 8 --max-new-tokens 128 --num-draft-tokens 5 --output spec.json
+
+The draft proposes a constant --num-draft-tokens per step here, so each main
+model forward pass verifies exactly that many draft tokens and the acceptance
+rate is (generated tokens - forward passes) / (forward passes x draft tokens).
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+from benchmarks.fake_superset import make_catalog
+from benchmarks.harness import percentile
+
+
+def build_prompts(count: int, sql_complexity: int, seed: int) -> List[str]:
+    """
+    One prompt per synthetic dashboard, with its chart SQL as the retrieved context.
+    """
+    from app.llm.prompts import build_insight_prompt
+
+    catalog = make_catalog(dashboards=count, charts_per_dashboard=5, sql_complexity=sql_complexity, seed=seed)
+    prompts = []
+    for dashboard in catalog["dashboards"].values():
+        chart_ids = [c["id"] for c in dashboard["charts"]][:5]
+        context = "\n".join(catalog["charts"][chart_id]["sql"] for chart_id in chart_ids)
+        prompts.append(build_insight_prompt(context))
+    return prompts
+
+
+def _timed(generator, prompt: str, **kwargs):
+    from app.llm.generation import generate_texts
+
+    start = time.perf_counter()
+    texts, stats = generate_texts(generator, [prompt], **kwargs)
+    return texts[0], stats, time.perf_counter() - start
+
+
+def run_benchmark(generator, draft_model, prompts: List[str], max_new_tokens: int, num_draft_tokens: int) -> Dict:
+    kwargs = {"max_new_tokens": max_new_tokens, "do_sample": False}
+    # Warm up both paths (allocations, kernel selection)
+    _timed(generator, prompts[0], **kwargs)
+    _timed(generator, prompts[0], assistant_model=draft_model, **kwargs)
+
+    samples = []
+    for prompt in prompts:
+        base_text, base_stats, base_seconds = _timed(generator, prompt, **kwargs)
+        spec_text, spec_stats, spec_seconds = _timed(generator, prompt, assistant_model=draft_model, **kwargs)
+        generated = spec_stats["generated_tokens"]
+        passes = max(spec_stats["forward_passes"], 1)
+        samples.append({
+            "identical": base_text == spec_text,
+            "baseline_seconds": base_seconds,
+            "assisted_seconds": spec_seconds,
+            "generated_tokens": generated,
+            "baseline_forward_passes": base_stats["forward_passes"],
+            "assisted_forward_passes": passes,
+            "tokens_per_forward_pass": generated / passes,
+            "acceptance_rate": max(generated - passes, 0) / (passes * num_draft_tokens),
+        })
+
+    baseline = sorted(s["baseline_seconds"] for s in samples)
+    assisted = sorted(s["assisted_seconds"] for s in samples)
+    total_tokens = sum(s["generated_tokens"] for s in samples)
+    total_passes = sum(s["assisted_forward_passes"] for s in samples)
+    return {
+        "prompts": len(samples),
+        "identical_outputs": sum(s["identical"] for s in samples),
+        "speedup": sum(baseline) / sum(assisted) if sum(assisted) else 0.0,
+        "baseline_p50_ms": percentile(baseline, 50) * 1000,
+        "assisted_p50_ms": percentile(assisted, 50) * 1000,
+        "baseline_tokens_per_second": total_tokens / sum(baseline) if sum(baseline) else 0.0,
+        "assisted_tokens_per_second": total_tokens / sum(assisted) if sum(assisted) else 0.0,
+        "tokens_per_forward_pass": total_tokens / total_passes if total_passes else 0.0,
+        "acceptance_rate": max(total_tokens - total_passes, 0) / (total_passes * num_draft_tokens)
+        if total_passes else 0.0,
+        "samples": samples,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assisted decoding benchmark on SQL-generation prompts")
+    parser.add_argument("--model", required=True, help="Main model name or local path")
+    parser.add_argument("--draft", required=True, help="Draft model name or local path (same tokenizer)")
+    parser.add_argument("--prompts", type=int, default=8)
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    parser.add_argument("--num-draft-tokens", type=int, default=5)
+    parser.add_argument("--sql-complexity", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    from app.llm.generation import load_generator, load_draft_model
+
+    generator = load_generator(args.model)
+    draft_model = load_draft_model(args.draft, generator, num_tokens=args.num_draft_tokens, schedule="constant")
+    prompts = build_prompts(args.prompts, args.sql_complexity, args.seed)
+
+    report = run_benchmark(generator, draft_model, prompts, args.max_new_tokens, args.num_draft_tokens)
+    report["config"] = {
+        "model": args.model,
+        "draft": args.draft,
+        "max_new_tokens": args.max_new_tokens,
+        "num_draft_tokens": args.num_draft_tokens,
+    }
+
+    print(
+        f"{report['prompts']} prompts: speedup {report['speedup']:.2f}x, "
+        f"p50 {report['baseline_p50_ms']:.0f} ms -> {report['assisted_p50_ms']:.0f} ms, "
+        f"acceptance {report['acceptance_rate'] * 100:.1f}%, "
+        f"{report['tokens_per_forward_pass']:.2f} tokens/forward pass, "
+        f"identical outputs {report['identical_outputs']}/{report['prompts']}"
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
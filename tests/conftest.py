@@ -0,0 +1,5 @@
+import os
+
+# app.config requires the Superset connection settings; tests never reach Superset
+os.environ.setdefault("SUPERSET_BASE_URL", "http://superset.test")
+os.environ.setdefault("SUPERSET_API_KEY", "test")
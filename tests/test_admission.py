@@ -0,0 +1,67 @@
+import threading
+import time
+import pytest
+from app.core.admission import (
+    AdmissionController, AdmissionRejected, BULK, INTERACTIVE, PRECOMPUTE, rejection_to_http,
+)
+
+
+def wait_for(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.01)
+
+
+def test_waiters_are_admitted_by_priority():
+    controller = AdmissionController("test_priority", max_concurrency=1, max_queue=10)
+    admitted = []
+
+    def waiter(priority):
+        with controller.admit(priority=priority):
+            admitted.append(priority)
+
+    threads = []
+    with controller.admit(priority=INTERACTIVE):
+        # Queue the lowest priority first so arrival order and priority order differ
+        for queued, priority in enumerate([BULK, PRECOMPUTE, INTERACTIVE], start=1):
+            thread = threading.Thread(target=waiter, args=(priority,))
+            thread.start()
+            threads.append(thread)
+            wait_for(lambda: len(controller._waiters) == queued)
+    for thread in threads:
+        thread.join(5)
+    assert admitted == [INTERACTIVE, PRECOMPUTE, BULK]
+
+
+def test_zero_queue_rejects_with_retry_after():
+    controller = AdmissionController("test_no_queue", max_concurrency=1, max_queue=0)
+    with controller.admit():
+        with pytest.raises(AdmissionRejected) as exc:
+            with controller.admit():
+                pass
+    assert exc.value.reason == "queue_full"
+    http = rejection_to_http(exc.value)
+    assert http.status_code == 429
+    assert int(http.headers["Retry-After"]) >= 1
+
+
+def test_wait_budget_rejects_queued_request():
+    controller = AdmissionController("test_timeout", max_concurrency=1, max_queue=5)
+    with controller.admit():
+        with pytest.raises(AdmissionRejected) as exc:
+            with controller.admit(max_wait=0.05):
+                pass
+    assert exc.value.reason == "timeout"
+    assert controller._waiters == []
+
+
+def test_slot_released_on_exception():
+    controller = AdmissionController("test_release", max_concurrency=1, max_queue=0)
+    with pytest.raises(ValueError):
+        with controller.admit():
+            raise ValueError("stage failed")
+    assert controller._active == 0
+    # The slot is free again: a plain in-flight cap admits without queueing
+    with controller.admit():
+        assert controller._active == 1
@@ -0,0 +1,112 @@
+import json
+from contextlib import contextmanager
+from types import SimpleNamespace
+import pytest
+from app.config import settings
+from app.sql import cost_guard, executor
+from app.sql.cost_guard import ALLOW, LIMIT, QUEUE, REJECT, check_query_cost, clear_plan_cache
+
+
+class FakeEngine:
+    """
+    Answers EXPLAIN with a canned plan and records the statements it was asked to plan.
+    """
+
+    def __init__(self, dialect, plan):
+        self.dialect = SimpleNamespace(name=dialect)
+        self.url = f"{dialect}://fake"
+        self.plan = plan
+        self.explained = []
+
+    @contextmanager
+    def connect(self):
+        yield self
+
+    def execute(self, statement, params=None):
+        self.explained.append(str(statement))
+        return SimpleNamespace(scalar=lambda: json.dumps(self.plan), fetchall=lambda: [])
+
+
+def pg_plan(cost, rows):
+    return [{"Plan": {"Node Type": "Seq Scan", "Total Cost": cost, "Plan Rows": rows}}]
+
+
+@pytest.fixture(autouse=True)
+def guard_settings(monkeypatch):
+    monkeypatch.setattr(settings, "SQL_MAX_PLAN_COST", 1e7)
+    monkeypatch.setattr(settings, "SQL_SLOW_PLAN_COST", 1e6)
+    monkeypatch.setattr(settings, "SQL_MAX_PLAN_ROWS", 1e5)
+    monkeypatch.setattr(settings, "SQL_GUARD_LIMIT", 20)
+    clear_plan_cache()
+    yield
+    clear_plan_cache()
+
+
+@pytest.mark.parametrize("cost, rows, action", [
+    (5e7, 10, REJECT),
+    (5e6, 10, QUEUE),
+    (5e6, 1e6, QUEUE),
+    (100, 1e6, LIMIT),
+    (100, 10, ALLOW),
+])
+def test_decision_from_postgres_plan(cost, rows, action):
+    decision = check_query_cost("SELECT * FROM t", FakeEngine("postgresql", pg_plan(cost, rows)))
+    assert decision.action == action
+    assert decision.plan.total_cost == cost and decision.plan.rows == rows
+
+
+def test_too_many_rows_tightens_limit():
+    decision = check_query_cost("SELECT * FROM t", FakeEngine("postgresql", pg_plan(100, 1e6)))
+    assert decision.query.endswith("LIMIT 20")
+    assert "1000000 rows" in decision.reason
+
+
+def test_queued_query_with_too_many_rows_is_also_limited():
+    decision = check_query_cost("SELECT * FROM t", FakeEngine("postgresql", pg_plan(5e6, 1e6)))
+    assert decision.action == QUEUE
+    assert decision.query.endswith("LIMIT 20")
+    assert "cost" in decision.reason and "rows" in decision.reason
+
+
+def test_decision_from_mysql_plan():
+    plan = {"query_block": {
+        "cost_info": {"query_cost": "2000000.5"},
+        "nested_loop": [
+            {"table": {"table_name": "a", "rows_produced_per_join": 5000}},
+            {"table": {"table_name": "b", "rows_produced_per_join": 3}},
+        ],
+    }}
+    decision = check_query_cost("SELECT * FROM a JOIN b USING (id)", FakeEngine("mysql", plan))
+    assert decision.action == QUEUE
+    assert decision.plan.rows == 3
+
+
+def test_no_estimates_allows():
+    decision = check_query_cost("SELECT 1", FakeEngine("sqlite", None))
+    assert decision.action == ALLOW and decision.plan.total_cost is None
+
+
+def test_decision_applies_to_run_query():
+    engine = FakeEngine("postgresql", pg_plan(100, 1e6))
+    decision = check_query_cost("SELECT * FROM t", engine, run_query="SELECT * FROM t LIMIT 50")
+    assert engine.explained == ["EXPLAIN (FORMAT JSON) SELECT * FROM t"]
+    assert decision.query == "SELECT * FROM (SELECT * FROM t LIMIT 50) AS limited_query LIMIT 20"
+
+
+def test_executor_plans_query_before_injecting_limit(monkeypatch):
+    # A Limit root node would cap Plan Rows at the injected limit and scale its cost down
+    engine = FakeEngine("postgresql", pg_plan(5e7, 1e9))
+    monkeypatch.setattr(executor, "get_engine", lambda uri: engine)
+    monkeypatch.setattr(executor, "_run_query", lambda *args: pytest.fail("rejected query must not run"))
+    with pytest.raises(cost_guard.QueryCostExceeded):
+        executor.execute_sql_dynamic("SELECT * FROM a CROSS JOIN b", "postgresql://fake", limit=50)
+    assert engine.explained == ["EXPLAIN (FORMAT JSON) SELECT * FROM a CROSS JOIN b"]
+
+
+def test_executor_runs_limited_query(monkeypatch):
+    engine = FakeEngine("postgresql", pg_plan(100, 10))
+    ran = []
+    monkeypatch.setattr(executor, "get_engine", lambda uri: engine)
+    monkeypatch.setattr(executor, "_run_query", lambda engine, query, timeout: ran.append(query) or [])
+    executor.execute_sql_dynamic("SELECT * FROM t", "postgresql://fake", limit=50)
+    assert ran == ["SELECT * FROM t LIMIT 50"]
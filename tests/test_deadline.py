@@ -0,0 +1,53 @@
+import threading
+import time
+from app.core.deadline import Deadline, DeadlineExceeded, DEADLINE_EXCEEDED, check_deadline, deadline_scope
+import pytest
+
+
+def test_cancel_runs_registered_callbacks():
+    deadline = Deadline(10)
+    calls = []
+    with deadline.on_cancel(lambda: calls.append("abort")):
+        deadline.cancel(DEADLINE_EXCEEDED)
+        deadline.cancel(DEADLINE_EXCEEDED)
+    assert calls == ["abort"]
+    assert deadline.remaining() == 0.0
+
+
+def test_no_callback_after_block_exits():
+    deadline = Deadline(10)
+    calls = []
+    with deadline.on_cancel(lambda: calls.append("abort")):
+        pass
+    deadline.cancel(DEADLINE_EXCEEDED)
+    assert calls == []
+
+
+def test_block_exit_waits_for_running_callback():
+    # The resource guarded by the block (a pooled connection) must not be released
+    # while a cancel of it is still in flight
+    deadline = Deadline(10)
+    started = threading.Event()
+    released = threading.Event()
+    seen_released = []
+
+    def abort():
+        started.set()
+        time.sleep(0.2)
+        seen_released.append(released.is_set())
+
+    canceller = threading.Thread(target=deadline.cancel, args=(DEADLINE_EXCEEDED,))
+    with deadline.on_cancel(abort):
+        canceller.start()
+        assert started.wait(5)
+    released.set()
+    canceller.join(5)
+    assert seen_released == [False]
+
+
+def test_check_deadline_raises_after_expiry():
+    with deadline_scope(Deadline(0)):
+        with pytest.raises(DeadlineExceeded) as exc:
+            check_deadline("sql_execution")
+    assert exc.value.reason == DEADLINE_EXCEEDED
+    assert exc.value.stage == "sql_execution"
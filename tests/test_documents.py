@@ -0,0 +1,61 @@
+import pytest
+from app.llm.documents import CHART, CHART_SQL, DASHBOARD, DATASET, canonical_doc_id, dedupe_documents, parse_doc_id
+
+
+@pytest.mark.parametrize("value, parsed", [
+    ("dashboard:12", (DASHBOARD, 12)),
+    ("chart:40", (CHART, 40)),
+    ("chart_sql:40", (CHART_SQL, 40)),
+    ("dataset:7", (DATASET, 7)),
+    # build_document_texts
+    ("chart-40", (CHART, 40)),
+    ("dataset-7", (DATASET, 7)),
+    ("dashboard-12", (DASHBOARD, 12)),
+    # VectorStore.ingest_dashboard_metadata
+    ("dashboard_12_chart_40", (CHART, 40)),
+    ("dashboard_12_dataset_7", (DATASET, 7)),
+    # insights training pack SQL
+    ("chart_40", (CHART_SQL, 40)),
+])
+def test_parse_doc_id(value, parsed):
+    assert parse_doc_id(value) == parsed
+
+
+@pytest.mark.parametrize("value", ["chart:abc", "widget:1", "chart_40_extra", "dashboard_12", ""])
+def test_parse_doc_id_unrecognized(value):
+    assert parse_doc_id(value) is None
+
+
+def doc(doc_id, text=""):
+    return {"id": doc_id, "text": text or doc_id, "embedding": [0.0]}
+
+
+def test_dedupe_canonical_id_wins():
+    documents = [doc("chart-40"), doc("dashboard_12_chart_40"), doc("chart:40"), doc("dashboard_13_chart_40")]
+    kept, unrecognized = dedupe_documents(documents)
+    assert kept == {"chart:40": documents[2]}
+    assert unrecognized == 0
+
+
+def test_dedupe_first_legacy_copy_wins_without_canonical():
+    documents = [doc("dashboard_12_dataset_7"), doc("dataset-7")]
+    kept, _ = dedupe_documents(documents)
+    assert kept == {"dataset:7": documents[0]}
+
+
+def test_dedupe_keeps_kinds_apart_and_unrecognized_ids():
+    documents = [doc("chart_40"), doc("chart-40"), doc("notes"), doc("notes")]
+    kept, unrecognized = dedupe_documents(documents)
+    assert set(kept) == {"chart_sql:40", "chart:40", "notes"}
+    assert unrecognized == 2
+    assert canonical_doc_id("chart_40") == "chart_sql:40"
+
+
+def test_orphans_skipped_when_a_resource_lists_nothing():
+    pytest.importorskip("chromadb")
+    from app.core.compact_vector_store import find_orphans
+
+    parsed = {"chart:1": (CHART, 1), "chart:2": (CHART, 2), "dataset:7": (DATASET, 7)}
+    assert find_orphans(parsed, {"chart": {1}, "dataset": {7}}) == (["chart:2"], None)
+    orphans, skipped = find_orphans(parsed, {"chart": {1}, "dataset": set()})
+    assert orphans == [] and "dataset" in skipped
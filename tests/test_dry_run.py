@@ -0,0 +1,68 @@
+import pytest
+from app.sql.dry_run import (
+    SchemaReplica, INCONCLUSIVE, UNKNOWN_COLUMN, UNKNOWN_TABLE, dry_run_sql, schema_is_complete,
+)
+
+TABLES = {"orders": {"id": "BIGINT", "created_at": "TIMESTAMP", "tags": "ARRAY<STRING>"}}
+
+
+@pytest.fixture
+def replica():
+    replica = SchemaReplica(TABLES)
+    yield replica
+    replica.close()
+
+
+def test_valid_query_passes(replica):
+    result = replica.check("SELECT id, tags FROM orders WHERE created_at > CURRENT_TIMESTAMP;")
+    assert result.ok and result.error_type is None
+
+
+def test_unknown_column_is_rejected(replica):
+    result = replica.check("SELECT o.bogus FROM orders o")
+    assert not result.ok
+    assert (result.error_type, result.name) == (UNKNOWN_COLUMN, "o.bogus")
+
+
+def test_unknown_table_is_rejected_when_schema_is_complete(replica):
+    result = replica.check("SELECT id FROM customers")
+    assert not result.ok
+    assert (result.error_type, result.name) == (UNKNOWN_TABLE, "customers")
+
+
+@pytest.mark.parametrize("sql", [
+    # Warehouse built-ins without parentheses look like columns to SQLite
+    "SELECT LOCALTIMESTAMP, id FROM orders",
+    "SELECT id FROM orders WHERE created_at > SYSDATE",
+    "SELECT CURRENT_USER, id FROM orders",
+    # Syntax SQLite does not know
+    "SELECT id FROM orders WHERE created_at > now() - INTERVAL '1 day'",
+    "SELECT id::text FROM orders",
+    "SELECT id FROM orders WHERE tags ILIKE '%a%'",
+    # Schema-qualified name of a known table, table functions
+    "SELECT id FROM public.orders",
+    "SELECT * FROM generate_series(1, 10)",
+])
+def test_dialect_features_are_inconclusive(replica, sql):
+    result = replica.check(sql)
+    assert result.ok
+    assert result.error_type == INCONCLUSIVE
+
+
+def test_unknown_table_is_inconclusive_when_schema_is_partial(replica):
+    result = replica.check("SELECT id FROM customers", complete=False)
+    assert result.ok and result.error_type == INCONCLUSIVE
+
+
+def test_virtual_dataset_makes_schema_incomplete():
+    physical = {"id": 1, "table_name": "orders", "sql": None}
+    virtual = {"id": 2, "table_name": "orders_enriched", "sql": "SELECT * FROM orders JOIN customers USING (id)"}
+    assert schema_is_complete([physical])
+    assert not schema_is_complete([physical, virtual])
+    assert not schema_is_complete([{"id": 3, "table_name": "v", "kind": "virtual"}])
+
+
+def test_unreplicable_schema_is_inconclusive():
+    # NUL in an identifier cannot be created in SQLite
+    result = dry_run_sql("SELECT 1", 9001, "v1", {"bad\x00name": {"id": "INT"}})
+    assert result.ok and result.error_type == INCONCLUSIVE
@@ -0,0 +1,105 @@
+from decimal import Decimal
+import pytest
+from app.core.fast_path import describe_rows, prepare_chart_sql, select_chart_sql
+from app.sql.analysis import analyze_sql
+
+
+def charts(*sqls):
+    return [{"chart_id": i, "sql": sql} for i, sql in enumerate(sqls, start=1)]
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT region FROM sales WHERE day > '{{ from_dttm }}'",
+    "SELECT region FROM sales {% if filter_values('region') %}WHERE region = 'x'{% endif %}",
+    "SELECT region FROM sales WHERE id = :id",
+    "SELECT region FROM sales WHERE id = %(id)s",
+    "DELETE FROM sales",
+    "WITH d AS (DELETE FROM sales RETURNING *) SELECT * FROM d",
+    "SELECT 1; SELECT 2",
+    "",
+])
+def test_rejects_unrunnable_or_unsafe_queries(sql):
+    assert prepare_chart_sql(sql, 50) is None
+
+
+def test_keeps_postgres_casts():
+    assert prepare_chart_sql("SELECT amount::text FROM sales", 50) is not None
+
+
+def test_adds_limit():
+    assert analyze_sql(prepare_chart_sql("SELECT region FROM sales", 50)).limit == 50
+
+
+def test_keeps_smaller_limit():
+    query = prepare_chart_sql("SELECT region FROM sales LIMIT 10", 50)
+    assert analyze_sql(query).limit == 10
+    assert "limited_query" not in query
+
+
+def test_tightens_larger_limit():
+    query = prepare_chart_sql("SELECT region FROM sales LIMIT 500", 50)
+    assert analyze_sql(query).limit == 50
+    assert "LIMIT 500" in query
+
+
+def test_tightens_cte_query():
+    query = prepare_chart_sql("WITH c AS (SELECT region FROM sales) SELECT * FROM c", 50)
+    assert query.startswith("SELECT * FROM (WITH c AS")
+    assert analyze_sql(query).limit == 50
+
+
+def test_prefers_tables_most_charts_use():
+    chosen = select_chart_sql(charts(
+        "SELECT region, SUM(amount) FROM users GROUP BY region",
+        "SELECT amount FROM sales",
+        "SELECT day FROM sales",
+    ))
+    assert chosen.chart_id in (2, 3)
+
+
+def test_prefers_aggregates_at_equal_coverage():
+    chosen = select_chart_sql(charts(
+        "SELECT amount FROM sales",
+        "SELECT region, SUM(amount) AS total_amount FROM sales GROUP BY region",
+    ))
+    assert chosen.chart_id == 2
+
+
+def test_prefers_fewer_tables_then_shorter_sql():
+    chosen = select_chart_sql(charts(
+        "SELECT a.x FROM a JOIN b ON a.id = b.id",
+        "SELECT amount, region FROM sales",
+        "SELECT amount FROM sales",
+    ))
+    # The join covers two tables used once each; sales is used twice by single-table charts
+    assert chosen.chart_id == 3
+
+
+def test_no_candidate():
+    assert select_chart_sql(charts("SELECT * FROM t WHERE id = :id", "DROP TABLE t")) is None
+    assert select_chart_sql([]) is None
+
+
+def test_describe_empty_result():
+    assert describe_rows([]) == "The query returned no rows."
+
+
+def test_describe_non_numeric_result():
+    rows = [{"region": "north"}, {"region": None}]
+    assert describe_rows(rows) == "The query returned 2 rows. It has no numeric columns to summarize."
+
+
+def test_describe_numeric_result():
+    rows = [
+        {"region": "north", "region_id": 1, "revenue": Decimal("100"), "orders": 3},
+        {"region": "south", "region_id": 2, "revenue": Decimal("300"), "orders": None},
+    ]
+    assert describe_rows(rows) == (
+        "The query returned 2 rows. revenue totals 400 (average 200, range 100 to 300). "
+        "The highest revenue is for region south at 300 (75% of the total). "
+        "region_id totals 3. orders totals 3."
+    )
+
+
+def test_describe_single_row():
+    assert describe_rows([{"total": 12.5}]) == "The query returned 1 row. total is 12.50."
@@ -0,0 +1,49 @@
+import time
+from app.config import settings
+from app.core import precompute
+from app.core.precompute import PrecomputeScheduler
+
+
+class FakeRedis:
+    """
+    Just the SET NX / XX PX semantics the cycle claim relies on.
+    """
+
+    def __init__(self):
+        self.values = {}
+
+    def set(self, name, value, nx=False, xx=False, px=None):
+        current = self.values.get(name)
+        live = current is not None and current[1] > time.monotonic()
+        if (nx and live) or (xx and not live):
+            return None
+        self.values[name] = (value, time.monotonic() + px / 1000)
+        return True
+
+
+def test_one_scheduler_runs_each_cycle(monkeypatch):
+    monkeypatch.setattr(precompute, "redis_client", FakeRedis())
+    decays = []
+    monkeypatch.setattr(precompute, "top_dashboards", lambda n: [])
+    monkeypatch.setattr(precompute, "decay_dashboard_hits", decays.append)
+
+    workers = [PrecomputeScheduler() for _ in range(4)]
+    for worker in workers:
+        worker.run_cycle()
+    assert decays == [settings.PRECOMPUTE_HIT_DECAY]
+
+
+def test_next_cycle_after_interval(monkeypatch):
+    monkeypatch.setattr(precompute, "redis_client", FakeRedis())
+    monkeypatch.setattr(settings, "PRECOMPUTE_INTERVAL_SECONDS", 0.05)
+    decays = []
+    monkeypatch.setattr(precompute, "top_dashboards", lambda n: [])
+    monkeypatch.setattr(precompute, "decay_dashboard_hits", decays.append)
+
+    first, second = PrecomputeScheduler(), PrecomputeScheduler()
+    first.run_cycle()
+    second.run_cycle()
+    assert len(decays) == 1
+    time.sleep(0.1)
+    second.run_cycle()
+    assert len(decays) == 2
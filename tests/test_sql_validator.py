@@ -0,0 +1,51 @@
+import pytest
+from app.sql.analysis import analyze_sql, with_limit
+from app.sql.validator import validate_sql
+
+
+@pytest.mark.parametrize("sql, command", [
+    ("WITH d AS (DELETE FROM t RETURNING *) SELECT * FROM d LIMIT 1", "DELETE"),
+    ("WITH d AS (INSERT INTO t VALUES (1) RETURNING *) SELECT * FROM d LIMIT 1", "INSERT"),
+    ("WITH d AS (UPDATE t SET a = 1 RETURNING *) SELECT * FROM d LIMIT 1", "UPDATE"),
+    ("SELECT * FROM t WHERE a IN (SELECT a FROM (DELETE FROM u RETURNING a) x) LIMIT 1", "DELETE"),
+])
+def test_rejects_data_modifying_cte(sql, command):
+    is_valid, message = validate_sql(sql)
+    assert not is_valid
+    assert command in message
+
+
+def test_rejects_select_into():
+    is_valid, message = validate_sql("SELECT * INTO newtable FROM t LIMIT 1")
+    assert not is_valid
+    assert "INTO" in message
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT a FROM t LIMIT 10",
+    "WITH c AS (SELECT a FROM t) SELECT * FROM c LIMIT 10",
+    "SELECT credit_limit, 'delete me' FROM t LIMIT 5",
+    "(SELECT 1) LIMIT 3",
+    "SELECT a FROM t ORDER BY a FETCH FIRST 5 ROWS ONLY",
+])
+def test_accepts_read_only_queries(sql):
+    assert validate_sql(sql) == (True, "SQL is valid")
+
+
+@pytest.mark.parametrize("sql, limit", [
+    ("SELECT a FROM t ORDER BY a FETCH FIRST 5 ROWS ONLY", 5),
+    ("SELECT a FROM t OFFSET 2 ROWS FETCH NEXT 7 ROWS ONLY", 7),
+    ("SELECT a FROM t FETCH FIRST ROW ONLY", 1),
+    ("(SELECT 1) LIMIT 3", 3),
+])
+def test_detects_limit(sql, limit):
+    analysis = analyze_sql(sql)
+    assert analysis.has_limit
+    assert analysis.limit == limit
+    assert with_limit(sql, 100) == sql
+
+
+def test_parenthesized_select_is_a_select():
+    analysis = analyze_sql("(SELECT 1) LIMIT 3")
+    assert analysis.commands == ("SELECT",)
+    assert analysis.statement_type == "SELECT"